@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from base.const import CATALOG_CACHE_SIZE, CATALOG_VERSION_CHECK_INTERVAL, STOCK_CACHE_TTL, STOCK_CACHE_SIZE
+from base.models import Telephone, catalog_version
+
+
+class ThrottledVersion:
+    def __init__(self, loader, interval):
+        self._lock = threading.Lock()
+        self._loader = loader
+        self._interval = interval
+        self._version = None
+        self._expires = 0
+        self.checks = 0
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._version is None or now >= self._expires:
+                self._version = self._loader()
+                self._expires = now + self._interval
+                self.checks += 1
+            return self._version
+
+
+class CatalogCache:
+    def __init__(self, max_entries=CATALOG_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._version = None
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    def _sync_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def _store(self, key, value, version):
+        if self._version == version:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, loader, version=None):
+        if version is None:
+            version = catalog_version.get()
+        with self._lock:
+            self._sync_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = loader()
+
+        with self._lock:
+            self._store(key, value, version)
+        return value
+
+    def get_or_set_many(self, keys, loader, version=None):
+        if version is None:
+            version = catalog_version.get()
+        found = {}
+        waiting = {}
+        owned = []
+        with self._lock:
+            self._sync_version(version)
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[key] = self._entries[key]
+                elif key in self._inflight:
+                    self.coalesced += 1
+                    waiting[key] = self._inflight[key]
+                else:
+                    self.misses += 1
+                    self._inflight[key] = Future()
+                    owned.append(key)
+
+        if owned:
+            try:
+                loaded = loader(owned)
+            except Exception as e:
+                with self._lock:
+                    for key in owned:
+                        self._inflight.pop(key).set_exception(e)
+                raise
+            with self._lock:
+                for key in owned:
+                    value = loaded.get(key)
+                    self._store(key, value, version)
+                    self._inflight.pop(key).set_result(value)
+                    found[key] = value
+
+        for key, future in waiting.items():
+            found[key] = future.result()
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'size': len(self._entries),
+                'max_size': self._max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'coalesced': self.coalesced,
+            }
+
+
+class TTLCache:
+    def __init__(self, ttl, max_entries):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_set_many(self, keys, loader):
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self.hits += 1
+                    found[key] = entry[1]
+                else:
+                    self.misses += 1
+                    missing.append(key)
+
+        if missing:
+            loaded = loader(missing)
+            expires = time.monotonic() + self._ttl
+            with self._lock:
+                for key in missing:
+                    value = loaded.get(key)
+                    self._entries[key] = (expires, value)
+                    self._entries.move_to_end(key)
+                    found[key] = value
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return found
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl': self._ttl,
+                'size': len(self._entries),
+                'max_size': self._max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+catalog_version_check = ThrottledVersion(catalog_version.get, CATALOG_VERSION_CHECK_INTERVAL)
+catalog_cache = CatalogCache()
+stock_cache = TTLCache(STOCK_CACHE_TTL, STOCK_CACHE_SIZE)
+
+
+def get_live_stock(telephone_ids):
+    return stock_cache.get_or_set_many(
+        telephone_ids, lambda ids: {row['id']: row for row in Telephone.get_stock(ids)}
+    )
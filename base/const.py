@@ -1,6 +1,30 @@
-from datetime import datetime
-
-from base.utils import get_last_month
-
-END_DATE_DEFAULT = datetime.now().strftime('%Y-%m-%d')
-START_DATE_DEFAULT = get_last_month()
+CATALOG_PAGE_SIZE = 20
+CATALOG_PAGE_SIZE_MAX = 100
+CATALOG_CACHE_SIZE = 1024
+CATALOG_VERSION_CHECK_INTERVAL = 1
+SEARCH_QUERY_MAX_LENGTH = 100
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+PRODUCT_BY_IDS_MAX = 100
+IMAGE_VARIANT_WORKERS = 2
+SIMILAR_DEFAULT_K = 5
+SIMILAR_MAX_K = 50
+PRODUCT_COMPARE_MAX = 10
+COMPARE_RANGE_ATTRIBUTES = ('price', 'effective_price', 'discount', 'diagonal_screen', 'memory_gb', 'weight',
+                            'number_stock', 'release_date')
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+SUGGEST_SCAN_LIMIT = 200
+STOCK_CACHE_TTL = 2
+STOCK_CACHE_SIZE = 4096
+ORDER_PAGE_SIZE = 50
+ORDER_PAGE_SIZE_MAX = 500
+ORDER_EXPORT_CHUNK_SIZE = 2000
+ORDER_EXPORT_FLUSH_BYTES = 64 * 1024
+ORDER_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+ORDER_IDEMPOTENCY_KEY_MAX_LENGTH = 255
+ORDER_INTAKE_WORKERS = 4
+ORDER_INTAKE_BATCH_SIZE = 20
+ORDER_INTAKE_POLL_INTERVAL = 0.5
+ORDER_INTAKE_METRICS_WINDOW = 15 * 60
+ORDER_BULK_CANCEL_MAX = 1000
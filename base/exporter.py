@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+
+from django.db import connection
+
+from base.const import ORDER_EXPORT_CHUNK_SIZE, ORDER_EXPORT_FLUSH_BYTES
+from base.models import Order
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+ORDER_FIELDS = ('id', 'status', 'user_id', 'first_name', 'second_name', 'surname', 'date', 'update_time', 'street',
+                'post_code', 'city', 'full_price', 'items_count')
+ORDER_LINE_FIELDS = ('id', 'telephone_id', 'price', 'amount', 'created_time', 'image')
+
+
+def iter_orders(start_date, end_date, order_status=None, user_id=None, chunk_size=ORDER_EXPORT_CHUNK_SIZE):
+    query, query_params = Order.get_full_data_query(start_date, end_date, order_status, user_id)
+    with connection.chunked_cursor() as cursor:
+        cursor.cursor.itersize = chunk_size
+        cursor.execute(query, query_params)
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+
+
+def _export_ndjson(orders):
+    for order in orders:
+        yield json.dumps(order, default=str) + '\n'
+
+
+def _export_csv(orders):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(list(ORDER_FIELDS) + [f'product_{field}' for field in ORDER_LINE_FIELDS])
+    for order in orders:
+        order_values = [order.get(field) for field in ORDER_FIELDS]
+        for product in order['products'] or [{}]:
+            writer.writerow(order_values + [product.get(field) for field in ORDER_LINE_FIELDS])
+        if buffer.tell() >= ORDER_EXPORT_FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_orders(file_format, start_date, end_date, order_status=None, user_id=None,
+                  chunk_size=ORDER_EXPORT_CHUNK_SIZE):
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+    orders = iter_orders(start_date, end_date, order_status, user_id, chunk_size)
+    if file_format == 'ndjson':
+        return _export_ndjson(orders)
+    return _export_csv(orders)
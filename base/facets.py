@@ -0,0 +1,180 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from django.db import connection
+
+from base.models import catalog_version
+from base.utils import parse_memory_gb
+
+LIST_FACETS = ('diagonal_screen', 'built_in_memory', 'brand')
+
+
+class FacetIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._rows = {}
+        self._postings = {facet: {} for facet in LIST_FACETS}
+        self._price = []
+        self._weight = []
+        self._memory = []
+        self._effective_price = []
+
+    def sync(self):
+        version = catalog_version.get()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            query = """
+                SELECT telephone_id, diagonal_screen, built_in_memory, brand_title, price, weight, memory_gb,
+                    effective_price
+                FROM base_catalog_listing
+            """
+            with connection.cursor() as cursor:
+                if self._version is None:
+                    cursor.execute(query)
+                    changed = cursor.fetchall()
+                    existing_ids = None
+                else:
+                    cursor.execute(query + " WHERE version > %s", [self._version])
+                    changed = cursor.fetchall()
+                    cursor.execute("SELECT telephone_id FROM base_catalog_listing")
+                    existing_ids = {row[0] for row in cursor.fetchall()}
+
+            if existing_ids is not None:
+                for telephone_id in set(self._rows) - existing_ids:
+                    self._remove(telephone_id)
+            for row in changed:
+                self._remove(row[0])
+                self._add(row)
+            self._version = version
+
+    def _add(self, row):
+        telephone_id, diagonal_screen, built_in_memory, brand, price, weight, memory_gb, effective_price = row
+        self._rows[telephone_id] = row
+        for facet, value in zip(LIST_FACETS, (diagonal_screen, built_in_memory, brand)):
+            self._postings[facet].setdefault(value, set()).add(telephone_id)
+        insort(self._price, (price, telephone_id))
+        insort(self._weight, (weight, telephone_id))
+        insort(self._effective_price, (effective_price, telephone_id))
+        if memory_gb is not None:
+            insort(self._memory, (memory_gb, telephone_id))
+
+    def _remove(self, telephone_id):
+        row = self._rows.pop(telephone_id, None)
+        if row is None:
+            return
+        _, diagonal_screen, built_in_memory, brand, price, weight, memory_gb, effective_price = row
+        for facet, value in zip(LIST_FACETS, (diagonal_screen, built_in_memory, brand)):
+            postings = self._postings[facet][value]
+            postings.discard(telephone_id)
+            if not postings:
+                del self._postings[facet][value]
+        del self._price[bisect_left(self._price, (price, telephone_id))]
+        del self._weight[bisect_left(self._weight, (weight, telephone_id))]
+        del self._effective_price[bisect_left(self._effective_price, (effective_price, telephone_id))]
+        if memory_gb is not None:
+            del self._memory[bisect_left(self._memory, (memory_gb, telephone_id))]
+
+    @staticmethod
+    def _range_ids(pairs, low, high):
+        if low is None and high is None:
+            return None
+        start = 0 if low is None else bisect_left(pairs, (low,))
+        end = len(pairs) if high is None else bisect_right(pairs, (high, float('inf')))
+        return {telephone_id for _, telephone_id in pairs[start:end]}
+
+    @staticmethod
+    def _intersect(sets):
+        sets = [item for item in sets if item is not None]
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set.intersection(*sets)
+
+    def _bounds(self, pairs, ids, column):
+        if ids is None:
+            if not pairs:
+                return None, None
+            return pairs[0][0], pairs[-1][0]
+        values = [self._rows[telephone_id][column] for telephone_id in ids
+                  if self._rows[telephone_id][column] is not None]
+        if not values:
+            return None, None
+        return min(values), max(values)
+
+    def _range_bounds(self, pairs, list_ids, range_ids, position, column):
+        other_ranges = range_ids[:position] + range_ids[position + 1:]
+        return self._bounds(pairs, self._intersect(list_ids + other_ranges), column)
+
+    @staticmethod
+    def _sort_key(facet):
+        if facet == 'built_in_memory':
+            return lambda value: (parse_memory_gb(value) is None, parse_memory_gb(value) or 0, value)
+        return None
+
+    def get_facets(self, diagonal_screen=None, built_in_memory=None, brand=None, price_min=None, price_max=None,
+                   weight_min=None, weight_max=None, memory_min=None, memory_max=None, effective_price_min=None,
+                   effective_price_max=None):
+        self.sync()
+        selection = {
+            'diagonal_screen': {float(value) for value in diagonal_screen or []},
+            'built_in_memory': set(built_in_memory or []),
+            'brand': set(brand or []),
+        }
+        price_min = float(price_min) if price_min is not None else None
+        price_max = float(price_max) if price_max is not None else None
+        weight_min = float(weight_min) if weight_min is not None else None
+        weight_max = float(weight_max) if weight_max is not None else None
+        memory_min = int(memory_min) if memory_min is not None else None
+        memory_max = int(memory_max) if memory_max is not None else None
+        effective_price_min = float(effective_price_min) if effective_price_min is not None else None
+        effective_price_max = float(effective_price_max) if effective_price_max is not None else None
+
+        with self._lock:
+            selected = {}
+            for facet in LIST_FACETS:
+                if selection[facet]:
+                    postings = self._postings[facet]
+                    selected[facet] = set().union(*(postings.get(value, set()) for value in selection[facet]))
+                else:
+                    selected[facet] = None
+            price_ids = self._range_ids(self._price, price_min, price_max)
+            weight_ids = self._range_ids(self._weight, weight_min, weight_max)
+            memory_ids = self._range_ids(self._memory, memory_min, memory_max)
+            effective_price_ids = self._range_ids(self._effective_price, effective_price_min, effective_price_max)
+            range_ids = [price_ids, weight_ids, memory_ids, effective_price_ids]
+
+            items = []
+            for facet in LIST_FACETS:
+                matching = self._intersect(
+                    [selected[other] for other in LIST_FACETS if other != facet] + range_ids
+                )
+                options = []
+                for value in sorted(self._postings[facet], key=self._sort_key(facet)):
+                    postings = self._postings[facet][value]
+                    count = len(postings) if matching is None else len(postings & matching)
+                    options.append({'value': value, 'count': count})
+                items.append({'title': facet, 'options': options})
+
+            list_ids = [selected[facet] for facet in LIST_FACETS]
+            min_price, max_price = self._range_bounds(self._price, list_ids, range_ids, 0, 4)
+            min_weight, max_weight = self._range_bounds(self._weight, list_ids, range_ids, 1, 5)
+            min_memory, max_memory = self._range_bounds(self._memory, list_ids, range_ids, 2, 6)
+            min_effective_price, max_effective_price = self._range_bounds(self._effective_price, list_ids,
+                                                                          range_ids, 3, 7)
+            total = self._intersect(list_ids + range_ids)
+
+        return {
+            "count": len(self._rows) if total is None else len(total),
+            "price_range": {'min_price': min_price, 'max_price': max_price},
+            "weight": {'min': min_weight, 'max': max_weight},
+            "memory_gb": {'min': min_memory, 'max': max_memory},
+            "effective_price_range": {'min_price': min_effective_price, 'max_price': max_effective_price},
+            "items": items,
+        }
+
+
+facet_index = FacetIndex()
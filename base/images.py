@@ -0,0 +1,77 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from PIL import Image
+
+from base.const import IMAGE_VARIANT_WORKERS
+
+IMAGE_VARIANTS = {
+    'thumbnail': (200, 200),
+    'medium': (600, 600),
+}
+IMAGE_VARIANT_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_image_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS)
+        return _executor
+
+
+def get_variant_name(name, variant, extension):
+    root, _ = os.path.splitext(name)
+    return f"{root}_{variant}.{extension}"
+
+
+def render_image_variant(media_root, name, variant, extension):
+    variant_name = get_variant_name(name, variant, extension)
+    with Image.open(os.path.join(media_root, name)) as image:
+        image.thumbnail(IMAGE_VARIANTS[variant])
+        if extension == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.save(os.path.join(media_root, variant_name), IMAGE_VARIANT_FORMATS[extension], quality=80)
+    return variant, extension, variant_name
+
+
+def render_image_variants(media_root, name):
+    variants = {}
+    for variant in IMAGE_VARIANTS:
+        for extension in IMAGE_VARIANT_FORMATS:
+            _, _, variant_name = render_image_variant(media_root, name, variant, extension)
+            variants.setdefault(variant, {})[extension] = variant_name
+    return variants
+
+
+def build_image_variants(name):
+    executor = get_image_executor()
+    futures = [
+        executor.submit(render_image_variant, str(settings.MEDIA_ROOT), name, variant, extension)
+        for variant in IMAGE_VARIANTS
+        for extension in IMAGE_VARIANT_FORMATS
+    ]
+    variants = {}
+    for future in futures:
+        variant, extension, variant_name = future.result()
+        variants.setdefault(variant, {})[extension] = variant_name
+    return variants
+
+
+def variants_match(name, variants):
+    return bool(variants) and all(
+        variants.get(variant, {}).get(extension) == get_variant_name(name, variant, extension)
+        for variant in IMAGE_VARIANTS
+        for extension in IMAGE_VARIANT_FORMATS
+    )
@@ -0,0 +1,92 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import get_error_detail
+
+from base.const import IMPORT_CHUNK_SIZE, IMPORT_MAX_REPORTED_ERRORS
+from base.models import Telephone, Brand
+from base.serializer import TelephoneSerializer
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+
+def read_rows(stream, file_format):
+    if file_format == 'csv':
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_number, row
+    elif file_format == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+                continue
+            yield line_number, row
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+class RowValidator:
+    def __init__(self, serializer_class=TelephoneSerializer):
+        self.fields = [field for field in serializer_class().fields.values() if not field.read_only]
+
+    def validate(self, row):
+        data = {}
+        errors = {}
+        for field in self.fields:
+            try:
+                data[field.source] = field.run_validation(field.get_value(row))
+            except ValidationError as e:
+                errors[field.field_name] = e.detail
+            except DjangoValidationError as e:
+                errors[field.field_name] = get_error_detail(e)
+        return data, errors
+
+
+def import_telephones(stream, file_format, chunk_size=IMPORT_CHUNK_SIZE):
+    validator = RowValidator()
+    brand_ids = {brand['id'] for brand in Brand.get_all()}
+    report = {'created': 0, 'updated': 0, 'error_count': 0, 'errors': []}
+
+    def add_error(line_number, errors):
+        report['error_count'] += 1
+        if len(report['errors']) < IMPORT_MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': line_number, 'errors': errors})
+
+    def flush(chunk):
+        try:
+            result = Telephone.bulk_upsert(list(chunk.values()))
+        except Exception as e:
+            for row in chunk.values():
+                add_error(row['line_number'], {'non_field_errors': [str(e)]})
+            return
+        report['created'] += result['created']
+        report['updated'] += result['updated']
+
+    chunk = {}
+    for line_number, row in read_rows(stream, file_format):
+        if not isinstance(row, dict):
+            add_error(line_number, {'non_field_errors': [str(row)]})
+            continue
+        data, errors = validator.validate(row)
+        if errors:
+            add_error(line_number, errors)
+            continue
+        if data['brand_id'] not in brand_ids:
+            add_error(line_number, {'brand_id': [f"Brand {data['brand_id']} does not exist"]})
+            continue
+        if data['title'] in chunk:
+            add_error(chunk[data['title']]['line_number'],
+                      {'title': [f"Superseded by row {line_number} with the same title"]})
+        chunk[data['title']] = {**data, 'line_number': line_number}
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = {}
+    if chunk:
+        flush(chunk)
+
+    return report
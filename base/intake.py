@@ -0,0 +1,156 @@
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from base.const import ORDER_INTAKE_BATCH_SIZE, ORDER_INTAKE_POLL_INTERVAL, ORDER_INTAKE_METRICS_WINDOW
+from base.models import Order, UserProfile
+from base.utils import dictfetchall, write_error_to_file
+
+
+def _load_json(value):
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def enqueue(payload, user_id=None):
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO base_order_intake (token, status, user_id, payload, attempts, created_time)
+            VALUES (%s, 'QUEUED', %s, %s, 0, %s)
+            RETURNING token;
+        """, [uuid.uuid4(), user_id, json.dumps(payload, cls=JSONEncoder), timezone.now()])
+        return cursor.fetchone()[0]
+
+
+def get_status(token):
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT token AS id, status, order_id, error, created_time, finished_time
+            FROM base_order_intake
+            WHERE token = %s;
+        """, [token])
+        result = dictfetchall(cursor)
+    if not result:
+        return None
+    intake = result[0]
+    intake['error'] = _load_json(intake['error'])
+    order_id = intake.pop('order_id')
+    intake['order'] = Order.get_item(order_id) if order_id else None
+    return intake
+
+
+def place_order(payload, user_id):
+    if user_id is None:
+        payload['username'] = str(uuid.uuid4())
+        payload['password'] = str(uuid.uuid4())
+        user_id = UserProfile.post(payload)
+    payload['user_id'] = user_id
+    return Order.post(payload)
+
+
+def process_next():
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT id, user_id, payload
+            FROM base_order_intake
+            WHERE status = 'QUEUED'
+            ORDER BY id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED;
+        """)
+        claimed = cursor.fetchone()
+        if claimed is None:
+            return False
+        intake_id, user_id, payload = claimed
+
+        try:
+            with transaction.atomic():
+                result = place_order(_load_json(payload), user_id)
+                if isinstance(result, dict) and 'error' in result:
+                    transaction.set_rollback(True)
+        except Exception as e:
+            write_error_to_file('order_intake.process_next', e)
+            result = {'error': str(e)}
+        if isinstance(result, dict) and 'error' in result:
+            intake_status, order_id, error = 'FAILED', None, json.dumps(result, cls=JSONEncoder)
+        else:
+            intake_status, order_id, error = 'DONE', result['id'], None
+
+        cursor.execute("""
+            UPDATE base_order_intake
+            SET status = %s,
+                order_id = %s,
+                error = %s::jsonb,
+                attempts = attempts + 1,
+                finished_time = %s
+            WHERE id = %s;
+        """, [intake_status, order_id, error, timezone.now(), intake_id])
+    return True
+
+
+def process_batch(batch_size=ORDER_INTAKE_BATCH_SIZE):
+    processed = 0
+    while processed < batch_size and process_next():
+        processed += 1
+    return processed
+
+
+def drain(batch_size=ORDER_INTAKE_BATCH_SIZE, poll_interval=ORDER_INTAKE_POLL_INTERVAL, once=False):
+    try:
+        while True:
+            if process_batch(batch_size) < batch_size:
+                if once:
+                    return
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+
+def queue_stats(window=ORDER_INTAKE_METRICS_WINDOW):
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT status, COUNT(*), MIN(created_time)
+            FROM base_order_intake
+            WHERE status = 'QUEUED' OR finished_time >= %s
+            GROUP BY status;
+        """, [now - timedelta(seconds=window)])
+        by_status = {row[0]: row[1:] for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                AVG(latency),
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY latency),
+                percentile_cont(0.95) WITHIN GROUP (ORDER BY latency),
+                MAX(latency)
+            FROM (
+                SELECT EXTRACT(EPOCH FROM finished_time - created_time) AS latency
+                FROM base_order_intake
+                WHERE finished_time >= %s
+            ) finished;
+        """, [now - timedelta(seconds=window)])
+        count, avg_latency, p50_latency, p95_latency, max_latency = cursor.fetchone()
+
+    depth, oldest_queued = by_status.get('QUEUED', (0, None))
+    return {
+        'depth': depth,
+        'oldest_queued_seconds': round((now - oldest_queued).total_seconds(), 3) if oldest_queued else None,
+        'window_seconds': window,
+        'done': by_status.get('DONE', (0,))[0],
+        'failed': by_status.get('FAILED', (0,))[0],
+        'latency_seconds': {
+            'count': count,
+            'avg': round(float(avg_latency), 3) if count else None,
+            'p50': round(float(p50_latency), 3) if count else None,
+            'p95': round(float(p95_latency), 3) if count else None,
+            'max': round(float(max_latency), 3) if count else None,
+        },
+    }
@@ -0,0 +1,105 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from base.const import CATALOG_PAGE_SIZE
+from base.models import Telephone
+from base.statements import prepared_statements
+
+SORT_FIELDS = (
+    'base_catalog_listing.title',
+    'base_catalog_listing.price',
+    'base_catalog_listing.effective_price',
+)
+
+
+class Command(BaseCommand):
+    help = ('Compare literal vs prepared catalog queries, opening a new connection per request (CONN_MAX_AGE=0) '
+            'and reusing one persistent connection')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT diagonal_screen FROM base_catalog_listing")
+            diagonal_screens = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT DISTINCT built_in_memory FROM base_catalog_listing")
+            memories = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT DISTINCT brand_title FROM base_catalog_listing")
+            brands = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT title FROM base_catalog_listing ORDER BY random() LIMIT 50")
+            titles = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT MIN(price), MAX(price), MIN(weight), MAX(weight) FROM base_catalog_listing")
+            price_low, price_high, weight_low, weight_high = cursor.fetchone()
+        if price_low is None:
+            raise CommandError('The catalog is empty')
+
+        def pick(values):
+            if not values or rng.random() < 0.5:
+                return None
+            return rng.sample(values, rng.randint(1, min(3, len(values))))
+
+        def pick_range(low, high):
+            if rng.random() < 0.6:
+                return None, None
+            start = rng.uniform(low, high)
+            return start, rng.uniform(start, high)
+
+        workload = []
+        for _ in range(options['iterations']):
+            price_min, price_max = pick_range(price_low, price_high)
+            weight_min, weight_max = pick_range(weight_low, weight_high)
+            filters = (pick(diagonal_screens), pick(memories), pick(brands), price_min, price_max, weight_min,
+                       weight_max)
+            kind = rng.random()
+            if kind < 0.6:
+                statement_name, query, query_params, _ = Telephone.get_page_statement(
+                    rng.choice(SORT_FIELDS), rng.choice(('asc', 'desc')), False, None, CATALOG_PAGE_SIZE, *filters
+                )
+            elif kind < 0.8:
+                statement_name, query, query_params = Telephone.search_statement(
+                    rng.choice(titles).split(' ')[0], None, CATALOG_PAGE_SIZE, *filters
+                )
+            else:
+                statement_name, query, query_params = Telephone.get_all_statement(
+                    rng.choice(SORT_FIELDS), rng.random() < 0.2, *filters
+                )
+            workload.append((statement_name, query, query_params))
+
+        report = {
+            'iterations': len(workload),
+            'distinct_prepared_statements': len({name for name, _, _ in workload}),
+        }
+        for persistent in (False, True):
+            for prepared in (False, True):
+                mode = f"{'prepared' if prepared else 'literal'}_{'persistent' if persistent else 'per_request'}"
+                report[mode] = self.run(workload, prepared, persistent)
+        connection.close()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    @staticmethod
+    def run(workload, prepared, persistent):
+        connection.close()
+        prepares = prepared_statements.prepares
+        started = time.perf_counter()
+        for statement_name, query, query_params in workload:
+            if not persistent:
+                connection.close()
+            with connection.cursor() as cursor:
+                if prepared:
+                    prepared_statements.execute(cursor, statement_name, query, query_params)
+                else:
+                    cursor.execute(query, query_params)
+                cursor.fetchall()
+        elapsed = time.perf_counter() - started
+        return {
+            'wall_ms': round(elapsed * 1000, 3),
+            'avg_ms': round(elapsed * 1000 / len(workload), 4),
+            'prepares': prepared_statements.prepares - prepares,
+        }
@@ -0,0 +1,49 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from base.const import IMAGE_VARIANT_WORKERS
+from base.images import render_image_variants, variants_match
+from base.models import TelephoneImage, catalog_listing
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and medium WebP/JPEG variants for telephone images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=IMAGE_VARIANT_WORKERS)
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that already exist')
+
+    def handle(self, *args, **options):
+        images = [
+            image for image in TelephoneImage.objects.only('id', 'image', 'variants', 'telephone_id')
+            if image.image and (options['force'] or not variants_match(image.image.name, image.variants))
+        ]
+        total = len(images)
+        if not total:
+            self.stdout.write(self.style.SUCCESS('All images already have variants'))
+            return
+
+        telephone_ids = set()
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(render_image_variants, str(settings.MEDIA_ROOT), image.image.name): image
+                for image in images
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                image = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"[{done}/{total}] {image.image.name}: {e}")
+                    continue
+                TelephoneImage.set_variants(image.id, variants)
+                telephone_ids.add(image.telephone_id)
+                self.stdout.write(f"[{done}/{total}] {image.image.name}")
+
+        if telephone_ids:
+            catalog_listing.refresh(telephone_ids)
+        self.stdout.write(self.style.SUCCESS(f"Processed {total - failed} images, {failed} failed"))
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from base.const import ORDER_EXPORT_CHUNK_SIZE
+from base.exporter import export_orders, EXPORT_FORMATS
+from base.utils import get_last_month, get_today
+
+
+class Command(BaseCommand):
+    help = 'Stream orders with their lines to CSV or NDJSON using a server-side cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--start-date', default=None, help='Defaults to one month ago')
+        parser.add_argument('--end-date', default=None, help='Inclusive, defaults to today')
+        parser.add_argument('--status', default=None)
+        parser.add_argument('--user-id', type=int, default=None)
+        parser.add_argument('--chunk-size', type=int, default=ORDER_EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', default=None, help='File to write to, defaults to stdout')
+
+    def handle(self, *args, **options):
+        start_date = options['start_date'] or get_last_month()
+        end_date = options['end_date'] or get_today()
+        chunks = export_orders(options['format'], start_date, end_date, options['status'],
+                               options['user_id'], options['chunk_size'])
+        if options['output'] is None:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as stream:
+            for chunk in chunks:
+                stream.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Orders exported to {options['output']}"))
@@ -0,0 +1,40 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.const import IMPORT_CHUNK_SIZE
+from base.importer import import_telephones, IMPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Import telephones from a CSV or NDJSON file, upserting by title'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, default=None)
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--max-seconds', type=float, default=None,
+                            help='Fail when the import takes longer than this many seconds')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot detect format of {path}, pass --format")
+
+        started = time.perf_counter()
+        with open(path, newline='', encoding='utf-8') as stream:
+            report = import_telephones(stream, file_format, options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        rows = report['created'] + report['updated'] + report['error_count']
+        report['elapsed_seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(rows / elapsed, 1) if elapsed else None
+
+        self.stdout.write(json.dumps(report, indent=2, default=str))
+        if report['error_count']:
+            self.stderr.write(f"{report['error_count']} rows were not imported")
+        if options['max_seconds'] is not None and elapsed > options['max_seconds']:
+            raise CommandError(f"Import took {elapsed:.1f}s, over the {options['max_seconds']}s target")
+        self.stdout.write(self.style.SUCCESS(f"Created {report['created']}, updated {report['updated']}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from base.models import order_idempotency_key
+
+
+class Command(BaseCommand):
+    help = 'Delete order idempotency keys whose TTL has expired'
+
+    def handle(self, *args, **options):
+        deleted = order_idempotency_key.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
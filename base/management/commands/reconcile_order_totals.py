@@ -0,0 +1,22 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Compare stored order totals and item counts with their order lines, optionally repairing drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rewrite drifted totals from the order lines')
+
+    def handle(self, *args, **options):
+        drifted = Order.reconcile_totals(repair=options['repair'])
+        self.stdout.write(json.dumps(drifted, indent=2, default=str))
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Order totals match their order lines'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drifted)} orders'))
+        else:
+            raise CommandError(f'{len(drifted)} orders have drifted totals, rerun with --repair to fix them')
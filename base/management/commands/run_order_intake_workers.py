@@ -0,0 +1,39 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from base.const import ORDER_INTAKE_WORKERS, ORDER_INTAKE_BATCH_SIZE, ORDER_INTAKE_POLL_INTERVAL
+from base.intake import drain
+
+
+class Command(BaseCommand):
+    help = 'Start worker processes that place queued asynchronous orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=ORDER_INTAKE_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=ORDER_INTAKE_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=ORDER_INTAKE_POLL_INTERVAL,
+                            help='Seconds to sleep once the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=drain, args=(options['batch_size'], options['poll_interval'], options['once']))
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} order intake workers")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.join()
+        failed = sum(1 for worker in workers if worker.exitcode)
+        if failed:
+            self.stderr.write(f"{failed} workers exited with an error")
+        self.stdout.write(self.style.SUCCESS('Order intake workers stopped'))
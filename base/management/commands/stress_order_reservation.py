@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from base.models import Order, Telephone
+
+FIXTURE_PREFIX = 'stress-order-reservation'
+
+
+def legacy_reserve(cursor, products):
+    product_prices = {}
+    for product_data in products:
+        Telephone.edit_amount(product_data['telephone_id'], -product_data['amount'])
+        cursor.execute("SELECT price, discount FROM base_telephone WHERE id = %s;", (product_data['telephone_id'],))
+        price, discount = cursor.fetchone()
+        product_prices[product_data['telephone_id']] = price - price * discount / 100
+    return product_prices
+
+
+class Command(BaseCommand):
+    help = ('Hammer stock reservation from concurrent workers and check for overselling. '
+            'The run uses its own fixture telephones, which are kept out of the catalog and deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--telephones', type=int, default=5, help='Fixture telephones reserved in every order')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=50, help='Reservations attempted by each worker')
+        parser.add_argument('--stock', type=int, default=100, help='Stock each telephone starts the run with')
+        parser.add_argument('--legacy', action='store_true', help='Also run the per-line SELECT/UPDATE reservation')
+
+    def handle(self, *args, **options):
+        if options['telephones'] < 1:
+            raise CommandError('--telephones must be at least 1')
+        self.delete_fixtures()
+        telephone_ids = self.create_fixtures(options['telephones'], options['stock'])
+
+        report = {}
+        try:
+            report['batched'] = self.run(Order.reserve_stock, telephone_ids, options)
+            if options['legacy']:
+                report['legacy'] = self.run(legacy_reserve, telephone_ids, options)
+        finally:
+            self.delete_fixtures()
+
+        if 'legacy' in report and report['legacy']['reservations_per_second']:
+            report['speedup'] = round(
+                report['batched']['reservations_per_second'] / report['legacy']['reservations_per_second'], 2
+            )
+        self.stdout.write(json.dumps(report, indent=2))
+        if report['batched']['oversold']:
+            raise CommandError('Batched reservation oversold stock')
+        self.stdout.write(self.style.SUCCESS('No overselling with batched reservation'))
+
+    @staticmethod
+    def create_fixtures(count, stock):
+        now = timezone.now()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO base_brand (title, created_time)
+                VALUES (%s, %s)
+                RETURNING id;
+            """, [FIXTURE_PREFIX, now])
+            brand_id = cursor.fetchone()[0]
+            placeholders = ', '.join(["(%s, '', 6.1, '128GB', 128, 100, 0, 170, %s, %s, %s, %s, %s)"] * count)
+            params = []
+            for number in range(count):
+                params += [f'{FIXTURE_PREFIX}-{number}', stock, brand_id, now.date(), now, now]
+            cursor.execute(f"""
+                INSERT INTO base_telephone (
+                    title, description, diagonal_screen, built_in_memory, memory_gb, price, discount, weight,
+                    number_stock, brand_id, release_date, created_time, update_time
+                )
+                VALUES {placeholders}
+                RETURNING id;
+            """, params)
+            return sorted(row[0] for row in cursor.fetchall())
+
+    @staticmethod
+    def delete_fixtures():
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM base_telephone
+                USING base_brand
+                WHERE base_telephone.brand_id = base_brand.id AND base_brand.title = %s;
+            """, [FIXTURE_PREFIX])
+            cursor.execute("DELETE FROM base_brand WHERE title = %s;", [FIXTURE_PREFIX])
+
+    @staticmethod
+    def set_stock(telephone_ids, stock):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE base_telephone SET number_stock = %s WHERE id = ANY(%s);", [stock, telephone_ids])
+
+    def run(self, reserve, telephone_ids, options):
+        self.set_stock(telephone_ids, options['stock'])
+        products = [{'telephone_id': telephone_id, 'amount': 1} for telephone_id in reversed(telephone_ids)]
+        counters = {'reserved': 0, 'rejected': 0, 'failed': 0}
+        counters_lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(options['attempts']):
+                    try:
+                        with transaction.atomic(), connection.cursor() as cursor:
+                            reserve(cursor, products)
+                        outcome = 'reserved'
+                    except ValidationError:
+                        outcome = 'rejected'
+                    except Exception:
+                        outcome = 'failed'
+                    with counters_lock:
+                        counters[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, number_stock FROM base_telephone WHERE id = ANY(%s)", [telephone_ids])
+            final_stock = dict(cursor.fetchall())
+        expected_stock = options['stock'] - counters['reserved']
+        return {
+            **counters,
+            'elapsed_seconds': round(elapsed, 3),
+            'reservations_per_second': round(counters['reserved'] / elapsed, 1) if elapsed else None,
+            'final_stock': final_stock,
+            'oversold': any(stock != expected_stock or stock < 0 for stock in final_stock.values()),
+        }
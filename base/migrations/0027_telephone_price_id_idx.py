@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0026_wish_list'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='telephone',
+            index=models.Index(fields=['price', 'id'], name='base_telephone_price_id_idx'),
+        ),
+    ]
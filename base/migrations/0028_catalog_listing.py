@@ -0,0 +1,68 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0027_telephone_price_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='catalog_listing',
+            fields=[
+                ('telephone', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='base.telephone')),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.CharField(max_length=200)),
+                ('brand_title', models.CharField(max_length=50)),
+                ('diagonal_screen', models.FloatField()),
+                ('built_in_memory', models.CharField(max_length=20)),
+                ('price', models.IntegerField()),
+                ('discount', models.IntegerField()),
+                ('effective_price', models.IntegerField()),
+                ('weight', models.FloatField()),
+                ('number_stock', models.IntegerField()),
+                ('release_date', models.DateField()),
+                ('images', models.JSONField(default=list)),
+                ('update_time', models.DateTimeField()),
+                ('brand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.brand')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['title', 'telephone'], name='catalog_listing_title_idx'), models.Index(fields=['price', 'telephone'], name='catalog_listing_price_idx'), models.Index(fields=['brand_title'], name='catalog_listing_brand_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO base_catalog_listing (
+                    telephone_id, title, description, brand_id, brand_title, diagonal_screen, built_in_memory,
+                    price, discount, effective_price, weight, number_stock, release_date, images, update_time
+                )
+                SELECT
+                    base_telephone.id,
+                    base_telephone.title,
+                    base_telephone.description,
+                    base_brand.id,
+                    base_brand.title,
+                    base_telephone.diagonal_screen,
+                    base_telephone.built_in_memory,
+                    base_telephone.price,
+                    base_telephone.discount,
+                    ROUND(base_telephone.price * (100 - base_telephone.discount) / 100.0)::integer,
+                    base_telephone.weight,
+                    base_telephone.number_stock,
+                    base_telephone.release_date,
+                    COALESCE((
+                        SELECT jsonb_agg(base_telephoneimage.image ORDER BY base_telephoneimage.created_time)
+                        FROM base_telephoneimage
+                        WHERE base_telephoneimage.telephone_id = base_telephone.id
+                    ), '[]'::jsonb),
+                    base_telephone.update_time
+                FROM base_telephone
+                JOIN base_brand ON base_telephone.brand_id = base_brand.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
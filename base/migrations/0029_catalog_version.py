@@ -0,0 +1,26 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0028_catalog_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='catalog_version',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('update_time', models.DateTimeField(auto_now=True, verbose_name='update_time')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='catalog_listing',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0029_catalog_version'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE base_catalog_listing
+                ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(brand_title, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+                ) STORED;
+                CREATE INDEX catalog_listing_search_idx
+                    ON base_catalog_listing USING gin (search_vector);
+                CREATE INDEX catalog_listing_title_trgm_idx
+                    ON base_catalog_listing USING gin (title gin_trgm_ops);
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS catalog_listing_title_trgm_idx;
+                DROP INDEX IF EXISTS catalog_listing_search_idx;
+                ALTER TABLE base_catalog_listing DROP COLUMN IF EXISTS search_vector;
+            """,
+        ),
+    ]
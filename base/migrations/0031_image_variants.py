@@ -0,0 +1,32 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0030_catalog_listing_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalog_listing',
+            name='image_variants',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='catalog_listing',
+            name='thumbnails',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='telephoneimage',
+            name='variants',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunSQL(
+            sql="UPDATE base_catalog_listing SET thumbnails = images",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0031_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalog_listing',
+            name='cover_image',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='telephone',
+            name='cover_image',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE base_telephone
+                SET cover_image = (
+                    SELECT COALESCE(base_telephoneimage.variants #>> '{thumbnail,webp}', base_telephoneimage.image)
+                    FROM base_telephoneimage
+                    WHERE base_telephoneimage.telephone_id = base_telephone.id
+                    ORDER BY base_telephoneimage.created_time, base_telephoneimage.id
+                    LIMIT 1
+                );
+                UPDATE base_catalog_listing
+                SET cover_image = base_telephone.cover_image
+                FROM base_telephone
+                WHERE base_catalog_listing.telephone_id = base_telephone.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0032_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalog_listing',
+            name='memory_gb',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='telephone',
+            name='memory_gb',
+            field=models.IntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='catalog_listing',
+            index=models.Index(fields=['memory_gb', 'telephone'], name='catalog_listing_memory_idx'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE base_telephone
+                SET memory_gb = ROUND(parsed.memory_match[1]::numeric * CASE lower(COALESCE(parsed.memory_match[2], 'gb'))
+                    WHEN 'tb' THEN 1024
+                    WHEN 'mb' THEN 1 / 1024.0
+                    ELSE 1
+                END)
+                FROM (
+                    SELECT id, regexp_match(built_in_memory, '^\\s*(\\d+(?:\\.\\d+)?)\\s*(mb|gb|tb)?\\s*$', 'i') AS memory_match
+                    FROM base_telephone
+                ) parsed
+                WHERE parsed.id = base_telephone.id AND parsed.memory_match IS NOT NULL;
+                UPDATE base_catalog_listing
+                SET memory_gb = base_telephone.memory_gb
+                FROM base_telephone
+                WHERE base_catalog_listing.telephone_id = base_telephone.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:52
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0033_memory_gb'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telephone',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.functions.math.Round(models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('price'), '*', django.db.models.expressions.CombinedExpression(models.Value(100), '-', models.F('discount'))), '/', models.Value(100.0)), output_field=models.DecimalField())), output_field=models.IntegerField()), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='catalog_listing',
+            index=models.Index(fields=['effective_price', 'telephone'], name='catalog_listing_eff_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telephone',
+            index=models.Index(fields=['effective_price', 'id'], name='base_telephone_eff_price_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0034_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='telephone',
+            index=models.Index(fields=['id'], include=('number_stock', 'effective_price'), name='base_telephone_stock_idx'),
+        ),
+    ]
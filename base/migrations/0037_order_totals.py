@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0036_order_update_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE base_order
+                SET total_price = order_lines.total_price,
+                    items_count = order_lines.items_count
+                FROM (
+                    SELECT
+                        order_id,
+                        SUM(amount * price) AS total_price,
+                        SUM(amount) AS items_count
+                    FROM base_order_product_details
+                    GROUP BY order_id
+                ) order_lines
+                WHERE base_order.id = order_lines.order_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
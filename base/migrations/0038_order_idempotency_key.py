@@ -0,0 +1,26 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:00
+
+import rest_framework.utils.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0037_order_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='order_idempotency_key',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('response_status', models.IntegerField(null=True)),
+                ('response_body', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder, null=True)),
+                ('created_time', models.DateTimeField(verbose_name='created_time')),
+                ('expires_time', models.DateTimeField(db_index=True, verbose_name='expires_time')),
+            ],
+        ),
+    ]
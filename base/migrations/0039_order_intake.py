@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:01
+
+import django.db.models.deletion
+import rest_framework.utils.encoders
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0038_order_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='order_intake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('status', models.CharField(choices=[('QUEUED', 'QUEUED'), ('DONE', 'DONE'), ('FAILED', 'FAILED')], default='QUEUED', max_length=20)),
+                ('payload', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('error', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('created_time', models.DateTimeField(verbose_name='created_time')),
+                ('finished_time', models.DateTimeField(null=True, verbose_name='finished_time')),
+                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='base.order')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'QUEUED')), fields=['id'], name='base_order_intake_queued_idx'), models.Index(fields=['finished_time'], name='base_order_intake_finish_idx')],
+            },
+        ),
+    ]
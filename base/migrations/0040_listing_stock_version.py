@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0039_order_intake'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalog_listing',
+            name='stock_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0040_listing_stock_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='telephone',
+            name='base_telephone_price_id_idx',
+        ),
+    ]
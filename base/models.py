@@ -1,15 +1,26 @@
-from datetime import datetime
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import datetime, timedelta
 
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from rest_framework.utils.encoders import JSONEncoder
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models, connection, transaction
+from django.db.models import F, Q, DecimalField, IntegerField, ExpressionWrapper
+from django.db.models.functions import Cast, Round
 from django.utils import timezone
 from psycopg2 import ProgrammingError
 
 from base.utils import get_user_image_upload_path, get_telephone_image_upload_path, dictfetchall, write_error_to_file, \
-    get_dates_with_null_values
+    get_dates_with_null_values, encode_cursor, decode_cursor, parse_memory_gb
+from base.images import build_image_variants
+from base.statements import prepared_statements
+from base.const import COMPARE_RANGE_ATTRIBUTES, ORDER_IDEMPOTENCY_KEY_TTL
 
 
 class City(models.Model):
@@ -287,7 +298,7 @@ class Brand(models.Model):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         data['created_time'] = current_time
 
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             query_telephone = """
                 INSERT INTO base_brand (
                     title,
@@ -302,22 +313,24 @@ class Brand(models.Model):
                     data['created_time'],
                 ])
             new_telephone_id = cursor.fetchone()[0]
+            catalog_version.bump()
         return Brand.get_item(new_telephone_id)
 
     @classmethod
     def delete_item(cls, base_brand):
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             query = """
                     DELETE FROM base_brand
                     WHERE id = %s;
                 """
             cursor.execute(query, [base_brand])
+            catalog_version.bump()
 
     @classmethod
     def patch_item(cls, brand_id, data):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         data['created_time'] = current_time
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             set_clause = ", ".join(f"{field} = %s" for field in data.keys())
             query_telephone = f"""
                  UPDATE base_brand
@@ -327,6 +340,7 @@ class Brand(models.Model):
             cursor.execute(
                 query_telephone, list(data.values()) + [brand_id]
             )
+            catalog_listing.refresh(brand_id=brand_id)
 
             return Brand.get_item(brand_id)
 
@@ -337,125 +351,377 @@ class Telephone(models.Model):
     brand = models.ForeignKey(Brand, on_delete=models.CASCADE)
     diagonal_screen = models.FloatField()
     built_in_memory = models.CharField(max_length=20)
+    memory_gb = models.IntegerField(null=True, editable=False, db_index=True)
     price = models.IntegerField()
     discount = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(100)])
+    effective_price = models.GeneratedField(
+        expression=Cast(
+            Round(ExpressionWrapper(F('price') * (100 - F('discount')) / 100.0, output_field=DecimalField())),
+            output_field=IntegerField()
+        ),
+        output_field=IntegerField(),
+        db_persist=True,
+    )
     weight = models.FloatField()
     number_stock = models.IntegerField()
     release_date = models.DateField()
+    cover_image = models.CharField(max_length=255, null=True, editable=False)
     created_time = models.DateTimeField(auto_now_add=True, verbose_name='created_time')
     update_time = models.DateTimeField(auto_now=True, verbose_name='update_time')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['effective_price', 'id'], name='base_telephone_eff_price_idx'),
+            models.Index(fields=['id'], include=['number_stock', 'effective_price'], name='base_telephone_stock_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     @classmethod
     def get_list(cls, ids):
+        if not ids:
+            return []
         with connection.cursor() as cursor:
             placeholders = ', '.join(['%s'] * len(ids))
 
             query = f"""SELECT 
-                base_telephone.id AS id, 
-                base_telephone.title AS title, 
-                base_telephone.price AS price, 
-                base_brand.title AS brand,
-                base_telephone.description AS description, 
-                base_telephone.diagonal_screen AS diagonal_screen,
-                base_telephone.built_in_memory AS built_in_memory,
-                base_telephone.weight AS weight,
-                base_telephone.number_stock AS number_stock,
-                base_telephone.discount AS discount, 
-                base_telephone.release_date AS release_date,
-                COALESCE(json_agg(base_telephoneimage.image), '[]'::json) AS images
-                FROM base_telephone 
-                JOIN base_brand 
-                    ON base_telephone.brand_id = base_brand.id
-                LEFT JOIN base_telephoneimage 
-                    ON base_telephone.id = base_telephoneimage.telephone_id
-                WHERE base_telephone.id IN ({placeholders})
-                GROUP BY 
-                    base_telephone.id, 
-                    base_brand.title
-                ORDER BY 
-                    base_telephone.title;
+                base_catalog_listing.telephone_id AS id, 
+                base_catalog_listing.title AS title, 
+                base_catalog_listing.price AS price, 
+                base_catalog_listing.effective_price AS effective_price, 
+                base_catalog_listing.brand_title AS brand,
+                base_catalog_listing.description AS description, 
+                base_catalog_listing.diagonal_screen AS diagonal_screen,
+                base_catalog_listing.built_in_memory AS built_in_memory,
+                base_catalog_listing.memory_gb AS memory_gb,
+                base_catalog_listing.weight AS weight,
+                base_catalog_listing.number_stock AS number_stock,
+                base_catalog_listing.discount AS discount, 
+                base_catalog_listing.release_date AS release_date,
+                base_catalog_listing.thumbnails AS images,
+                base_catalog_listing.cover_image AS cover_image
+                FROM base_catalog_listing 
+                WHERE base_catalog_listing.telephone_id IN ({placeholders});
             """
             cursor.execute(query, ids)
-            data = dictfetchall(cursor)
-        return data
+            data = {row['id']: row for row in dictfetchall(cursor)}
+        return [data[telephone_id] for telephone_id in ids if telephone_id in data]
+
+    @classmethod
+    def get_stock(cls, ids):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, number_stock, effective_price
+                FROM base_telephone
+                WHERE id = ANY(%s);
+            """, [ids])
+            return dictfetchall(cursor)
+
+    @classmethod
+    def get_compare(cls, ids):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    base_catalog_listing.telephone_id AS id,
+                    base_catalog_listing.title AS title,
+                    base_catalog_listing.brand_title AS brand,
+                    base_catalog_listing.price AS price,
+                    base_catalog_listing.effective_price AS effective_price,
+                    base_catalog_listing.discount AS discount,
+                    base_catalog_listing.diagonal_screen AS diagonal_screen,
+                    base_catalog_listing.built_in_memory AS built_in_memory,
+                    base_catalog_listing.memory_gb AS memory_gb,
+                    base_catalog_listing.weight AS weight,
+                    base_catalog_listing.number_stock AS number_stock,
+                    base_catalog_listing.release_date AS release_date,
+                    base_catalog_listing.cover_image AS cover_image
+                FROM base_catalog_listing
+                WHERE base_catalog_listing.telephone_id = ANY(%s)
+                ORDER BY array_position(%s, base_catalog_listing.telephone_id);
+            """, [ids, ids])
+            names = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+
+        columns = dict(zip(names, zip(*rows))) if rows else {name: () for name in names}
+        attributes = []
+        for name in names[1:]:
+            values = list(columns[name])
+            attribute = {'name': name, 'values': values, 'differs': len(set(values)) > 1}
+            if name in COMPARE_RANGE_ATTRIBUTES:
+                known = [value for value in values if value is not None]
+                attribute['min'] = min(known) if known else None
+                attribute['max'] = max(known) if known else None
+            attributes.append(attribute)
+        return {'ids': list(columns['id']), 'attributes': attributes}
 
     @classmethod
     def get_all(cls, sort_by, full_data, diagonal_screen=None, built_in_memory=None, brand=None, price_min=None, price_max=None,
-                weight_min=None, weight_max=None):
+                weight_min=None, weight_max=None, memory_min=None, memory_max=None, effective_price_min=None,
+                effective_price_max=None):
+        statement_name, query, query_params = cls.get_all_statement(sort_by, full_data, diagonal_screen,
+                                                                    built_in_memory, brand, price_min, price_max,
+                                                                    weight_min, weight_max, memory_min, memory_max,
+                                                                    effective_price_min, effective_price_max)
         with connection.cursor() as cursor:
-            print(full_data)
-            if full_data:
-                query = """
-                    SELECT 
-                        base_telephone.id AS id, 
-                        base_telephone.title AS title, 
-                        base_telephone.price AS price, 
-                        base_brand.title AS brand,
-                        base_telephone.description AS description, 
-                        base_telephone.diagonal_screen AS diagonal_screen,
-                        base_telephone.built_in_memory AS built_in_memory,
-                        base_telephone.weight AS weight,
-                        base_telephone.number_stock AS number_stock,
-                        base_telephone.discount AS discount, 
-                        base_telephone.release_date AS release_date,
-                        COALESCE(json_agg(base_telephoneimage.image), '[]'::json) AS images
-                    FROM base_telephone 
-                    JOIN base_brand ON base_telephone.brand_id = base_brand.id
-                    LEFT JOIN base_telephoneimage ON base_telephone.id = base_telephoneimage.telephone_id
-                    WHERE 1=1
-                """
-            else:
-                query = """
-                    SELECT
-                        base_telephone.id AS id,
-                        base_telephone.title AS title,
-                        base_telephone.price AS price,
-                        base_brand.title AS brand,
-                        COALESCE(json_agg(base_telephoneimage.image), '[]'::json) AS images
-                    FROM
-                        base_telephone
-                    JOIN
-                        base_brand ON base_telephone.brand_id = base_brand.id
-                    LEFT JOIN
-                        base_telephoneimage ON base_telephone.id = base_telephoneimage.telephone_id
-                    WHERE 1=1
-                """
+            prepared_statements.execute(cursor, statement_name, query, query_params)
+            result = dictfetchall(cursor)
 
-            conditions = []
+        return result
+
+    @classmethod
+    def get_all_statement(cls, sort_by, full_data, diagonal_screen=None, built_in_memory=None, brand=None,
+                          price_min=None, price_max=None, weight_min=None, weight_max=None, memory_min=None,
+                          memory_max=None, effective_price_min=None, effective_price_max=None):
+        if full_data:
+            query = """
+                SELECT 
+                    base_catalog_listing.telephone_id AS id, 
+                    base_catalog_listing.title AS title, 
+                    base_catalog_listing.price AS price, 
+                    base_catalog_listing.effective_price AS effective_price, 
+                    base_catalog_listing.brand_title AS brand,
+                    base_catalog_listing.description AS description, 
+                    base_catalog_listing.diagonal_screen AS diagonal_screen,
+                    base_catalog_listing.built_in_memory AS built_in_memory,
+                    base_catalog_listing.memory_gb AS memory_gb,
+                    base_catalog_listing.weight AS weight,
+                    base_catalog_listing.number_stock AS number_stock,
+                    base_catalog_listing.discount AS discount, 
+                    base_catalog_listing.release_date AS release_date,
+                    base_catalog_listing.images AS images
+                FROM base_catalog_listing 
+                WHERE 1=1
+            """
+        else:
+            query = """
+                SELECT
+                    base_catalog_listing.telephone_id AS id,
+                    base_catalog_listing.title AS title,
+                    base_catalog_listing.price AS price,
+                    base_catalog_listing.brand_title AS brand,
+                    base_catalog_listing.thumbnails AS images,
+                    base_catalog_listing.cover_image AS cover_image
+                FROM
+                    base_catalog_listing
+                WHERE 1=1
+            """
 
-            if diagonal_screen:
-                conditions.append(f"base_telephone.diagonal_screen IN ({', '.join(map(str, diagonal_screen))})")
+        conditions, query_params = cls._get_filter_conditions(diagonal_screen, built_in_memory, brand, price_min,
+                                                              price_max, weight_min, weight_max, memory_min,
+                                                              memory_max, effective_price_min, effective_price_max)
+        query += " AND " + " AND ".join(conditions)
+        query += f" ORDER BY {sort_by}, base_catalog_listing.telephone_id"
 
-            if built_in_memory:
-                conditions.append(f"base_telephone.built_in_memory IN ({', '.join(map(str, built_in_memory))})")
+        sort_name = re.sub(r'\W+', '_', sort_by.split('.')[-1].lower())
+        statement_name = f"catalog_all_{'full' if full_data else 'short'}_{sort_name}"
+        return statement_name, query, query_params
 
-            if brand:
-                brand_list = "', '".join(brand)
-                conditions.append(f"base_brand.title IN ('{brand_list}')")
+    @classmethod
+    def _get_filter_conditions(cls, diagonal_screen=None, built_in_memory=None, brand=None, price_min=None,
+                               price_max=None, weight_min=None, weight_max=None, memory_min=None, memory_max=None,
+                               effective_price_min=None, effective_price_max=None):
+        diagonal_screen = [float(value) for value in diagonal_screen] if diagonal_screen else None
+        built_in_memory = list(built_in_memory) if built_in_memory else None
+        brand = list(brand) if brand else None
+        price_min = float(price_min) if price_min is not None else None
+        price_max = float(price_max) if price_max is not None else None
+        weight_min = float(weight_min) if weight_min is not None else None
+        weight_max = float(weight_max) if weight_max is not None else None
+        memory_min = int(memory_min) if memory_min is not None else None
+        memory_max = int(memory_max) if memory_max is not None else None
+        effective_price_min = float(effective_price_min) if effective_price_min is not None else None
+        effective_price_max = float(effective_price_max) if effective_price_max is not None else None
+
+        conditions = [
+            "(%s::float8[] IS NULL OR base_catalog_listing.diagonal_screen = ANY(%s::float8[]))",
+            "(%s::text[] IS NULL OR base_catalog_listing.built_in_memory = ANY(%s::text[]))",
+            "(%s::text[] IS NULL OR base_catalog_listing.brand_title = ANY(%s::text[]))",
+            "base_catalog_listing.price BETWEEN COALESCE(%s::float8, '-Infinity') AND COALESCE(%s::float8, 'Infinity')",
+            "base_catalog_listing.weight BETWEEN COALESCE(%s::float8, '-Infinity') AND COALESCE(%s::float8, 'Infinity')",
+            "(%s::integer IS NULL OR base_catalog_listing.memory_gb >= %s::integer)",
+            "(%s::integer IS NULL OR base_catalog_listing.memory_gb <= %s::integer)",
+            "base_catalog_listing.effective_price BETWEEN COALESCE(%s::float8, '-Infinity') "
+            "AND COALESCE(%s::float8, 'Infinity')",
+        ]
+        query_params = [
+            diagonal_screen, diagonal_screen,
+            built_in_memory, built_in_memory,
+            brand, brand,
+            price_min, price_max,
+            weight_min, weight_max,
+            memory_min, memory_min,
+            memory_max, memory_max,
+            effective_price_min, effective_price_max,
+        ]
+        return conditions, query_params
 
-            if price_min is not None:
-                conditions.append(f"base_telephone.price >= {price_min}")
+    @classmethod
+    def get_page(cls, sort_by, sort_dir, full_data, page_cursor, limit, diagonal_screen=None, built_in_memory=None,
+                 brand=None, price_min=None, price_max=None, weight_min=None, weight_max=None, memory_min=None,
+                 memory_max=None, effective_price_min=None, effective_price_max=None):
+        statement_name, query, query_params, backwards = cls.get_page_statement(
+            sort_by, sort_dir, full_data, page_cursor, limit, diagonal_screen, built_in_memory, brand, price_min,
+            price_max, weight_min, weight_max, memory_min, memory_max, effective_price_min, effective_price_max
+        )
+        with connection.cursor() as cursor:
+            prepared_statements.execute(cursor, statement_name, query, query_params)
+            result = dictfetchall(cursor)
 
-            if price_max is not None:
-                conditions.append(f"base_telephone.price <= {price_max}")
+        has_more = len(result) > limit
+        result = result[:limit]
+        if backwards:
+            result.reverse()
+
+        sort_key = sort_by.split('.')[-1]
+
+        def make_cursor(row, direction):
+            return encode_cursor({
+                'sort': sort_by,
+                'dir': sort_dir,
+                'direction': direction,
+                'value': row[sort_key],
+                'id': row['id'],
+            })
+
+        next_cursor = None
+        prev_cursor = None
+        if result:
+            if has_more or backwards:
+                next_cursor = make_cursor(result[-1], 'next')
+            if (has_more and backwards) or (page_cursor and not backwards):
+                prev_cursor = make_cursor(result[0], 'prev')
 
-            if weight_min is not None:
-                conditions.append(f"base_telephone.weight >= {weight_min}")
+        return {
+            'next': next_cursor,
+            'prev': prev_cursor,
+            'results': result,
+        }
 
-            if weight_max is not None:
-                conditions.append(f"base_telephone.weight <= {weight_max}")
+    @classmethod
+    def get_page_statement(cls, sort_by, sort_dir, full_data, page_cursor, limit, diagonal_screen=None,
+                           built_in_memory=None, brand=None, price_min=None, price_max=None, weight_min=None,
+                           weight_max=None, memory_min=None, memory_max=None, effective_price_min=None,
+                           effective_price_max=None):
+        conditions, query_params = cls._get_filter_conditions(diagonal_screen, built_in_memory, brand, price_min,
+                                                              price_max, weight_min, weight_max, memory_min,
+                                                              memory_max, effective_price_min, effective_price_max)
+        backwards = False
+        if page_cursor:
+            position = decode_cursor(page_cursor)
+            if position['sort'] != sort_by or position['dir'] != sort_dir:
+                raise ValueError('Cursor does not match the requested sort')
+            backwards = position['direction'] == 'prev'
+            ascending = (sort_dir != 'desc') != backwards
+            conditions.append(f"({sort_by}, base_catalog_listing.telephone_id) {'>' if ascending else '<'} (%s, %s)")
+            query_params += [position['value'], position['id']]
+        else:
+            ascending = sort_dir != 'desc'
+        order = 'ASC' if ascending else 'DESC'
+
+        if full_data:
+            columns = """
+                base_catalog_listing.effective_price AS effective_price, 
+                base_catalog_listing.description AS description, 
+                base_catalog_listing.diagonal_screen AS diagonal_screen,
+                base_catalog_listing.built_in_memory AS built_in_memory,
+                base_catalog_listing.memory_gb AS memory_gb,
+                base_catalog_listing.weight AS weight,
+                base_catalog_listing.number_stock AS number_stock,
+                base_catalog_listing.discount AS discount, 
+                base_catalog_listing.release_date AS release_date,
+                base_catalog_listing.images AS images
+            """
+        else:
+            columns = "base_catalog_listing.thumbnails AS images, base_catalog_listing.cover_image AS cover_image"
 
-            if conditions:
-                query += " AND " + " AND ".join(conditions)
+        query = f"""
+            SELECT
+                base_catalog_listing.telephone_id AS id,
+                base_catalog_listing.title AS title,
+                base_catalog_listing.price AS price,
+                base_catalog_listing.brand_title AS brand,
+                {columns}
+            FROM base_catalog_listing
+            WHERE 1=1
+            {''.join(' AND ' + condition for condition in conditions)}
+            ORDER BY {sort_by} {order}, base_catalog_listing.telephone_id {order}
+            LIMIT %s
+        """
+        sort_name = re.sub(r'\W+', '_', sort_by.split('.')[-1].lower())
+        statement_name = (f"catalog_page_{'full' if full_data else 'short'}_{sort_name}_{order.lower()}_"
+                          f"{'after' if page_cursor else 'first'}")
+        return statement_name, query, query_params + [limit + 1], backwards
 
-            query += f" GROUP BY base_telephone.id, base_telephone.title, base_telephone.price, base_brand.title ORDER BY {sort_by};"
-            cursor.execute(query)
+    @classmethod
+    def search(cls, search_query, page_cursor, limit, diagonal_screen=None, built_in_memory=None, brand=None,
+               price_min=None, price_max=None, weight_min=None, weight_max=None, memory_min=None, memory_max=None,
+               effective_price_min=None, effective_price_max=None):
+        statement_name, query, query_params = cls.search_statement(
+            search_query, page_cursor, limit, diagonal_screen, built_in_memory, brand, price_min, price_max,
+            weight_min, weight_max, memory_min, memory_max, effective_price_min, effective_price_max
+        )
+        with connection.cursor() as cursor:
+            prepared_statements.execute(cursor, statement_name, query, query_params)
             result = dictfetchall(cursor)
 
-        return result
+        next_cursor = None
+        if len(result) > limit:
+            result = result[:limit]
+            next_cursor = encode_cursor({
+                'sort': 'rank',
+                'dir': 'desc',
+                'direction': 'next',
+                'value': result[-1]['rank'],
+                'id': result[-1]['id'],
+            })
+
+        return {
+            'next': next_cursor,
+            'results': result,
+        }
+
+    @classmethod
+    def search_statement(cls, search_query, page_cursor, limit, diagonal_screen=None, built_in_memory=None,
+                         brand=None, price_min=None, price_max=None, weight_min=None, weight_max=None,
+                         memory_min=None, memory_max=None, effective_price_min=None, effective_price_max=None):
+        conditions, filter_params = cls._get_filter_conditions(diagonal_screen, built_in_memory, brand, price_min,
+                                                               price_max, weight_min, weight_max, memory_min,
+                                                               memory_max, effective_price_min, effective_price_max)
+        query_params = [search_query, search_query, search_query] + filter_params
+        cursor_condition = ""
+        if page_cursor:
+            position = decode_cursor(page_cursor)
+            if position['sort'] != 'rank' or position['direction'] != 'next':
+                raise ValueError('Cursor does not match the requested sort')
+            cursor_condition = "WHERE (matches.rank, matches.id) < (%s, %s)"
+            query_params += [position['value'], position['id']]
+
+        query = f"""
+            SELECT *
+            FROM (
+                SELECT
+                    base_catalog_listing.telephone_id AS id,
+                    base_catalog_listing.title AS title,
+                    base_catalog_listing.price AS price,
+                    base_catalog_listing.brand_title AS brand,
+                    base_catalog_listing.thumbnails AS images,
+                    base_catalog_listing.cover_image AS cover_image,
+                    ts_rank(base_catalog_listing.search_vector, search_query)
+                        + similarity(base_catalog_listing.title, %s) AS rank
+                FROM base_catalog_listing, websearch_to_tsquery('simple', %s) AS search_query
+                WHERE (
+                    base_catalog_listing.search_vector @@ search_query
+                    OR base_catalog_listing.title %% %s
+                )
+                {''.join(' AND ' + condition for condition in conditions)}
+            ) matches
+            {cursor_condition}
+            ORDER BY matches.rank DESC, matches.id DESC
+            LIMIT %s
+        """
+        statement_name = f"catalog_search_{'after' if page_cursor else 'first'}"
+        return statement_name, query, query_params + [limit + 1]
 
     @classmethod
     def post_item(cls, data):
@@ -463,13 +729,14 @@ class Telephone(models.Model):
         data['created_time'] = current_time
         data['update_time'] = current_time
 
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             query_telephone = """
                 INSERT INTO base_telephone (
                     title,
                     description,
                     diagonal_screen,
                     built_in_memory,
+                    memory_gb,
                     price,
                     discount,
                     weight,
@@ -479,7 +746,7 @@ class Telephone(models.Model):
                     created_time,
                     update_time
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id;
             """
             cursor.execute(
@@ -488,6 +755,7 @@ class Telephone(models.Model):
                     data.get('description'),
                     data.get('diagonal_screen'),
                     data.get('built_in_memory'),
+                    parse_memory_gb(data.get('built_in_memory')),
                     data.get('price'),
                     data.get('discount'),
                     data.get('weight'),
@@ -498,14 +766,63 @@ class Telephone(models.Model):
                     data['update_time'],
                 ])
             new_telephone_id = cursor.fetchone()[0]
+            catalog_listing.refresh([new_telephone_id])
         return Telephone.get_item(new_telephone_id)
 
+    @classmethod
+    def bulk_upsert(cls, rows):
+        fields = ['title', 'description', 'diagonal_screen', 'built_in_memory', 'memory_gb', 'price', 'discount',
+                  'weight', 'number_stock', 'brand_id', 'release_date']
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            row = {**row, 'memory_gb': parse_memory_gb(row['built_in_memory'])}
+            writer.writerow([row[field] for field in fields])
+        buffer.seek(0)
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE telephone_import_staging (
+                    title varchar(100),
+                    description varchar(200),
+                    diagonal_screen double precision,
+                    built_in_memory varchar(20),
+                    memory_gb integer,
+                    price integer,
+                    discount integer,
+                    weight double precision,
+                    number_stock integer,
+                    brand_id bigint,
+                    release_date date
+                ) ON COMMIT DROP;
+            """)
+            cursor.copy_expert(
+                f"COPY telephone_import_staging ({', '.join(fields)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            cursor.execute(f"""
+                INSERT INTO base_telephone ({', '.join(fields)}, created_time, update_time)
+                SELECT {', '.join(fields)}, %s, %s
+                FROM telephone_import_staging
+                ON CONFLICT (title) DO UPDATE SET
+                    {', '.join(f'{field} = EXCLUDED.{field}' for field in fields if field != 'title')},
+                    update_time = EXCLUDED.update_time
+                RETURNING id, (xmax = 0) AS inserted;
+            """, [current_time, current_time])
+            result = cursor.fetchall()
+            catalog_listing.refresh([row[0] for row in result])
+
+        created = sum(1 for row in result if row[1])
+        return {'created': created, 'updated': len(result) - created}
+
     @classmethod
     def patch_item(cls, telephone_id, data):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         data['update_time'] = current_time
+        if 'built_in_memory' in data:
+            data['memory_gb'] = parse_memory_gb(data['built_in_memory'])
 
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             set_clause = ", ".join(f"{field} = %s" for field in data.keys())
             query_telephone = f"""
                       UPDATE base_telephone
@@ -515,34 +832,31 @@ class Telephone(models.Model):
             cursor.execute(
                 query_telephone, list(data.values()) + [telephone_id]
             )
+            catalog_listing.refresh([telephone_id])
             return Telephone.get_item(telephone_id)
 
     @classmethod
     def get_item(cls, telephone_id):
         with connection.cursor() as cursor:
             query = """SELECT
-                base_telephone.id AS id, 
-                base_telephone.title AS title, 
-                base_telephone.price AS price, 
-                base_brand.title AS brand,
-                base_brand.id AS brand_id,
-                base_telephone.description AS description, 
-                base_telephone.diagonal_screen AS diagonal_screen,
-                base_telephone.built_in_memory AS built_in_memory,
-                base_telephone.weight AS weight,
-                base_telephone.number_stock AS number_stock,
-                base_telephone.discount AS discount, 
-                base_telephone.release_date AS release_date,
-                COALESCE(json_agg(base_telephoneimage.image), '[]'::json) AS images
-                FROM base_telephone JOIN base_brand 
-                    ON base_telephone.brand_id = base_brand.id
-                LEFT JOIN base_telephoneimage 
-                    ON base_telephone.id = base_telephoneimage.telephone_id
-                WHERE base_telephone.id = %s
-                GROUP BY 
-                    base_telephone.id, 
-                    base_brand.title,
-                    base_brand.id;
+                base_catalog_listing.telephone_id AS id, 
+                base_catalog_listing.title AS title, 
+                base_catalog_listing.price AS price, 
+                base_catalog_listing.effective_price AS effective_price, 
+                base_catalog_listing.brand_title AS brand,
+                base_catalog_listing.brand_id AS brand_id,
+                base_catalog_listing.description AS description, 
+                base_catalog_listing.diagonal_screen AS diagonal_screen,
+                base_catalog_listing.built_in_memory AS built_in_memory,
+                base_catalog_listing.memory_gb AS memory_gb,
+                base_catalog_listing.weight AS weight,
+                base_catalog_listing.number_stock AS number_stock,
+                base_catalog_listing.discount AS discount, 
+                base_catalog_listing.release_date AS release_date,
+                base_catalog_listing.images AS images,
+                base_catalog_listing.image_variants AS image_variants
+                FROM base_catalog_listing
+                WHERE base_catalog_listing.telephone_id = %s;
                 """
             cursor.execute(query, [telephone_id])
             data = dictfetchall(cursor)
@@ -552,21 +866,33 @@ class Telephone(models.Model):
 
     @classmethod
     def delete_item(cls, telephone_id):
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                    SELECT id
+                    FROM base_telephone
+                    WHERE id = %s
+                    FOR UPDATE;
+                """, [telephone_id])
+            cursor.execute("""
+                    DELETE FROM base_catalog_listing
+                    WHERE telephone_id = %s;
+                """, [telephone_id])
             query = """
                     DELETE FROM base_telephone
                     WHERE id = %s;
                 """
             cursor.execute(query, [telephone_id])
+            catalog_version.bump()
 
     @classmethod
     def edit_amount(cls, telephone_id, amount):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             query_telephone = """
                    SELECT base_telephone.number_stock AS amount
                    FROM base_telephone
                    WHERE id = %s
+                   FOR UPDATE
                """
             cursor.execute(query_telephone, [telephone_id])
             data = cursor.fetchone()
@@ -581,68 +907,9 @@ class Telephone(models.Model):
                    WHERE id = %s
                """
             cursor.execute(query_telephone, [new_amount, current_time, telephone_id])
+            catalog_listing.refresh_stock([telephone_id])
             return cls.objects.get(id=telephone_id)
 
-    @classmethod
-    def get_filters(cls):
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                    SELECT MIN(price) AS min_price, MAX(price) AS max_price
-                    FROM base_telephone
-                """)
-            row = cursor.fetchone()
-            price_range = {'min_price': row[0], 'max_price': row[1]}
-
-            cursor.execute("""
-                    SELECT DISTINCT diagonal_screen
-                    FROM base_telephone
-                    ORDER BY diagonal_screen
-                """)
-            diagonal_screen_values = [row[0] for row in cursor.fetchall()]
-
-            cursor.execute("""
-                    SELECT DISTINCT built_in_memory
-                    FROM base_telephone
-                    ORDER BY built_in_memory
-                """)
-            built_in_memory_values = [row[0] for row in cursor.fetchall()]
-
-            cursor.execute("""
-                    SELECT DISTINCT base_brand.title
-                    FROM base_telephone
-                    JOIN base_brand ON base_telephone.brand_id = base_brand.id
-                    ORDER BY base_brand.title
-                """)
-            brand_values = [row[0] for row in cursor.fetchall()]
-
-            cursor.execute("""
-                            SELECT MIN(weight) AS min_weight, MAX(weight) AS max_weight
-                            FROM base_telephone
-                        """)
-            row = cursor.fetchone()
-            weight_range = {'min': row[0], 'max': row[1]}
-
-        items = [
-            {
-                "title": "diagonal_screen",
-                "options": diagonal_screen_values
-            },
-            {
-                "title": "built_in_memory",
-                "options": built_in_memory_values
-            },
-            {
-                "title": "brand",
-                "options": brand_values
-            }
-        ]
-
-        return {
-            "price_range": price_range,
-            "weight": weight_range,
-            "items": items,
-        }
-
     @classmethod
     def get_percent_sells(cls, start_date, end_date):
         with connection.cursor() as cursor:
@@ -720,30 +987,290 @@ class TelephoneImage(models.Model):
     image = models.ImageField(upload_to=get_telephone_image_upload_path)
     telephone = models.ForeignKey(Telephone, on_delete=models.CASCADE)
     created_time = models.DateTimeField(auto_now_add=True, verbose_name='created_time')
+    variants = models.JSONField(default=dict)
 
     @classmethod
     def post(cls, data):
-        with connection.cursor() as cursor:
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        variants = build_image_variants(str(data.get('image')))
+        with transaction.atomic(), connection.cursor() as cursor:
             query_image = """
                 INSERT INTO base_telephoneimage (
                     title,
-                    image
+                    image,
+                    telephone_id,
+                    created_time,
+                    variants
                 )
-                VALUES (%s, %s);
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id;
                             """
             cursor.execute(
-                query_image, [data.get('title'), data.get('image')])
-            new_image_id = cursor.lastrowid
+                query_image, [data.get('title'), data.get('image'), data.get('telephone_id'), current_time,
+                              json.dumps(variants)])
+            new_image_id = cursor.fetchone()[0]
+            cls.refresh_cover_image([data.get('telephone_id')])
+            catalog_listing.refresh([data.get('telephone_id')])
         return new_image_id
 
     @classmethod
     def delete_item(cls, image_id):
-        with connection.cursor() as cursor:
+        with transaction.atomic(), connection.cursor() as cursor:
             query = """
                         DELETE FROM base_telephoneimage
-                        WHERE id = %s;
+                        WHERE id = %s
+                        RETURNING telephone_id;
                     """
             cursor.execute(query, [image_id])
+            deleted = cursor.fetchone()
+            if deleted:
+                cls.refresh_cover_image([deleted[0]])
+                catalog_listing.refresh([deleted[0]])
+
+    @classmethod
+    def set_variants(cls, image_id, variants):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE base_telephoneimage
+                SET variants = %s
+                WHERE id = %s
+                RETURNING telephone_id;
+            """, [json.dumps(variants), image_id])
+            updated = cursor.fetchone()
+            if updated:
+                cls.refresh_cover_image([updated[0]])
+        if updated:
+            return updated[0]
+        return None
+
+    @classmethod
+    def refresh_cover_image(cls, telephone_ids):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE base_telephone
+                SET cover_image = (
+                    SELECT COALESCE(base_telephoneimage.variants #>> '{thumbnail,webp}', base_telephoneimage.image)
+                    FROM base_telephoneimage
+                    WHERE base_telephoneimage.telephone_id = base_telephone.id
+                    ORDER BY base_telephoneimage.created_time, base_telephoneimage.id
+                    LIMIT 1
+                )
+                WHERE base_telephone.id = ANY(%s);
+            """, [list(telephone_ids)])
+
+
+class catalog_listing(models.Model):
+    telephone = models.OneToOneField(Telephone, on_delete=models.CASCADE, primary_key=True)
+    title = models.CharField(max_length=100)
+    description = models.CharField(max_length=200)
+    brand = models.ForeignKey(Brand, on_delete=models.CASCADE)
+    brand_title = models.CharField(max_length=50)
+    diagonal_screen = models.FloatField()
+    built_in_memory = models.CharField(max_length=20)
+    memory_gb = models.IntegerField(null=True)
+    price = models.IntegerField()
+    discount = models.IntegerField()
+    effective_price = models.IntegerField()
+    weight = models.FloatField()
+    number_stock = models.IntegerField()
+    release_date = models.DateField()
+    images = models.JSONField(default=list)
+    thumbnails = models.JSONField(default=list)
+    image_variants = models.JSONField(default=list)
+    cover_image = models.CharField(max_length=255, null=True)
+    update_time = models.DateTimeField()
+    version = models.BigIntegerField(default=0, db_index=True)
+    stock_version = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'telephone'], name='catalog_listing_title_idx'),
+            models.Index(fields=['price', 'telephone'], name='catalog_listing_price_idx'),
+            models.Index(fields=['effective_price', 'telephone'], name='catalog_listing_eff_price_idx'),
+            models.Index(fields=['brand_title'], name='catalog_listing_brand_idx'),
+            models.Index(fields=['memory_gb', 'telephone'], name='catalog_listing_memory_idx'),
+        ]
+
+    @classmethod
+    def refresh(cls, telephone_ids=None, brand_id=None):
+        query_conditions = []
+        query_params = []
+        if telephone_ids is not None:
+            query_conditions.append("base_telephone.id = ANY(%s)")
+            query_params.append(list(telephone_ids))
+        if brand_id is not None:
+            query_conditions.append("base_telephone.brand_id = %s")
+            query_params.append(brand_id)
+        query_condition = ""
+        if query_conditions:
+            query_condition = "WHERE " + " AND ".join(query_conditions)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT base_telephone.id
+                FROM base_telephone
+                {query_condition}
+                ORDER BY base_telephone.id
+                FOR UPDATE;
+            """, query_params)
+            version = catalog_version.bump()
+            query = f"""
+                INSERT INTO base_catalog_listing (
+                    telephone_id,
+                    title,
+                    description,
+                    brand_id,
+                    brand_title,
+                    diagonal_screen,
+                    built_in_memory,
+                    memory_gb,
+                    price,
+                    discount,
+                    effective_price,
+                    weight,
+                    number_stock,
+                    release_date,
+                    images,
+                    thumbnails,
+                    image_variants,
+                    cover_image,
+                    update_time,
+                    version
+                )
+                SELECT
+                    base_telephone.id,
+                    base_telephone.title,
+                    base_telephone.description,
+                    base_brand.id,
+                    base_brand.title,
+                    base_telephone.diagonal_screen,
+                    base_telephone.built_in_memory,
+                    base_telephone.memory_gb,
+                    base_telephone.price,
+                    base_telephone.discount,
+                    base_telephone.effective_price,
+                    base_telephone.weight,
+                    base_telephone.number_stock,
+                    base_telephone.release_date,
+                    COALESCE(telephone_images.images, '[]'::jsonb),
+                    COALESCE(telephone_images.thumbnails, '[]'::jsonb),
+                    COALESCE(telephone_images.image_variants, '[]'::jsonb),
+                    base_telephone.cover_image,
+                    NOW(),
+                    %s
+                FROM base_telephone
+                JOIN base_brand ON base_telephone.brand_id = base_brand.id
+                LEFT JOIN LATERAL (
+                    SELECT
+                        jsonb_agg(base_telephoneimage.image ORDER BY base_telephoneimage.created_time) AS images,
+                        jsonb_agg(
+                            COALESCE(base_telephoneimage.variants #>> '{{thumbnail,webp}}', base_telephoneimage.image)
+                            ORDER BY base_telephoneimage.created_time
+                        ) AS thumbnails,
+                        jsonb_agg(base_telephoneimage.variants ORDER BY base_telephoneimage.created_time) AS image_variants
+                    FROM base_telephoneimage
+                    WHERE base_telephoneimage.telephone_id = base_telephone.id
+                ) telephone_images ON TRUE
+                {query_condition}
+                ON CONFLICT (telephone_id) DO UPDATE SET
+                    title = EXCLUDED.title,
+                    description = EXCLUDED.description,
+                    brand_id = EXCLUDED.brand_id,
+                    brand_title = EXCLUDED.brand_title,
+                    diagonal_screen = EXCLUDED.diagonal_screen,
+                    built_in_memory = EXCLUDED.built_in_memory,
+                    memory_gb = EXCLUDED.memory_gb,
+                    price = EXCLUDED.price,
+                    discount = EXCLUDED.discount,
+                    effective_price = EXCLUDED.effective_price,
+                    weight = EXCLUDED.weight,
+                    number_stock = EXCLUDED.number_stock,
+                    release_date = EXCLUDED.release_date,
+                    images = EXCLUDED.images,
+                    thumbnails = EXCLUDED.thumbnails,
+                    image_variants = EXCLUDED.image_variants,
+                    cover_image = EXCLUDED.cover_image,
+                    update_time = EXCLUDED.update_time,
+                    version = EXCLUDED.version;
+            """
+            cursor.execute(query, [version] + query_params)
+
+    @classmethod
+    def refresh_stock(cls, telephone_ids):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE base_catalog_listing
+                SET number_stock = base_telephone.number_stock,
+                    stock_version = base_catalog_listing.stock_version + 1,
+                    update_time = NOW()
+                FROM base_telephone
+                WHERE base_catalog_listing.telephone_id = base_telephone.id
+                    AND base_telephone.id = ANY(%s);
+            """, [list(telephone_ids)])
+
+    @classmethod
+    def get_validators(cls, telephone_id):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT version, stock_version, update_time
+                FROM base_catalog_listing
+                WHERE telephone_id = %s
+            """, [telephone_id])
+            return cursor.fetchone()
+
+    @classmethod
+    def get_stock_version(cls, telephone_ids):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT COALESCE(SUM(stock_version), 0)
+                FROM base_catalog_listing
+                WHERE telephone_id = ANY(%s)
+            """, [list(telephone_ids)])
+            return cursor.fetchone()[0]
+
+
+class catalog_version(models.Model):
+    version = models.BigIntegerField(default=0)
+    update_time = models.DateTimeField(auto_now=True, verbose_name='update_time')
+
+    @classmethod
+    def get(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT version
+                FROM base_catalog_version
+                WHERE id = 1
+            """)
+            row = cursor.fetchone()
+        if row:
+            return row[0]
+        return 0
+
+    @classmethod
+    def get_validators(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT version, update_time
+                FROM base_catalog_version
+                WHERE id = 1
+            """)
+            row = cursor.fetchone()
+        if row:
+            return row
+        return 0, None
+
+    @classmethod
+    def bump(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO base_catalog_version (id, version, update_time)
+                VALUES (1, 1, NOW())
+                ON CONFLICT (id) DO UPDATE SET
+                    version = base_catalog_version.version + 1,
+                    update_time = NOW()
+                RETURNING version;
+            """)
+            return cursor.fetchone()[0]
 
 
 class Order(models.Model):
@@ -761,180 +1288,299 @@ class Order(models.Model):
     first_name = models.CharField(max_length=50)
     second_name = models.CharField(null=True, blank=True)
     surname = models.CharField(max_length=50)
+    total_price = models.BigIntegerField(default=0, editable=False)
+    items_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-update_time', '-id'], name='base_order_update_id_idx'),
+            models.Index(fields=['user', '-update_time', '-id'], name='base_order_user_update_idx'),
+        ]
 
     def __str__(self):
         return self.status
 
     @classmethod
-    def get_full_data(cls, start_date, end_date, order_status=None, user_id=None, ):
-        with connection.cursor() as cursor:
-            query_conditions = []
-            query_params = []
-
-            if order_status is not None:
-                query_conditions.append("base_order.status = %s")
-                query_params.append(order_status.upper())
-            if user_id is not None:
-                query_conditions.append("base_order.user_id = %s")
-                query_params.append(user_id)
-
-            query_condition = ""
-            if query_conditions:
-                query_condition = "AND ".join(query_conditions)
+    def _get_order_conditions(cls, start_date, end_date, order_status=None, user_id=None):
+        conditions = ["base_order.update_time >= %s", "base_order.update_time < %s::date + interval '1 day'"]
+        query_params = [start_date, end_date]
+        if order_status is not None:
+            conditions.append("base_order.status = %s")
+            query_params.append(order_status.upper())
+        if user_id is not None:
+            conditions.append("base_order.user_id = %s")
+            query_params.append(user_id)
+        return conditions, query_params
 
-            query_date = f"AND base_order.update_time BETWEEN '{start_date}' AND '{end_date}'"
+    @classmethod
+    def get_full_data_query(cls, start_date, end_date, order_status=None, user_id=None, page_cursor=None,
+                            limit=None):
+        conditions, query_params = cls._get_order_conditions(start_date, end_date, order_status, user_id)
+        if page_cursor:
+            position = decode_cursor(page_cursor)
+            if position['sort'] != 'update_time' or position['direction'] != 'next':
+                raise ValueError('Cursor does not match the requested sort')
+            conditions.append("(base_order.update_time, base_order.id) < (%s, %s)")
+            query_params += [position['value'], position['id']]
+        query_limit = ""
+        if limit is not None:
+            query_limit = "LIMIT %s"
+            query_params.append(limit)
 
-            query_order = f"""
+        query = f"""
+            SELECT
+                base_order.id AS id,
+                base_order.status AS status,
+                base_order.user_id AS user_id,
+                base_order.surname,
+                DATE(base_order.update_time) AS date,
+                base_order.first_name,
+                base_order.second_name,
+                base_address.street_name AS street,
+                base_address.post_code AS post_code,
+                base_city.name AS city,
+                base_order.total_price AS full_price,
+                base_order.items_count AS items_count,
+                COALESCE(order_lines.products, '[]'::json) AS products,
+                base_order.update_time AS update_time
+            FROM base_order
+            JOIN base_address ON base_order.address_id = base_address.id
+            JOIN base_city ON base_address.city_id = base_city.id
+            LEFT JOIN LATERAL (
                 SELECT
-                    base_order.id AS id,
-                    base_order.status AS status,
-                    base_order.user_id AS user_id,
-                    base_order.surname,
-                    DATE(base_order.created_time),
-                    DATE(base_order.update_time),
-                    base_order.first_name,
-                    base_order.second_name,
-                    base_address.street_name AS street,
-                    base_address.post_code AS post_code,
-                    base_city.name AS city,
-                    (
-                        SELECT SUM(base_order_product_details.amount * base_order_product_details.price)
-                        FROM base_order_product_details
-                        WHERE base_order_product_details.order_id = base_order.id
-                    ) AS full_price
-                FROM base_order 
-                JOIN base_address ON base_order.address_id = base_address.id
-                JOIN base_city ON base_address.city_id = base_city.id
-                WHERE 1=1
-                {query_condition}
-                {query_date}
-            """
-            cursor.execute(query_order, query_params)
-            result_orders = dictfetchall(cursor)
-
-            for order in result_orders:
-                order_id = order['id']
-                query_order_product_details = """
-                    SELECT
-                        base_order_product_details.id,
-                        base_order_product_details.telephone_id,
-                        base_order_product_details.price,
-                        base_order_product_details.amount,
-                        base_order_product_details.order_id,
-                        base_order_product_details.created_time,
-                        (
-                        SELECT image
-                        FROM base_telephoneimage
-                        WHERE telephone_id = base_order_product_details.telephone_id
-                        ORDER BY base_telephoneimage.created_time
-                        LIMIT 1
-                        )
-                    FROM base_order_product_details
-                    WHERE order_id = %s
-                """
-                cursor.execute(query_order_product_details, [order_id])
-                result_order_product_details = dictfetchall(cursor)
+                    json_agg(json_build_object(
+                        'id', base_order_product_details.id,
+                        'telephone_id', base_order_product_details.telephone_id,
+                        'price', base_order_product_details.price,
+                        'amount', base_order_product_details.amount,
+                        'order_id', base_order_product_details.order_id,
+                        'created_time', base_order_product_details.created_time,
+                        'image', base_telephone.cover_image
+                    ) ORDER BY base_order_product_details.id) AS products
+                FROM base_order_product_details
+                JOIN base_telephone ON base_order_product_details.telephone_id = base_telephone.id
+                WHERE base_order_product_details.order_id = base_order.id
+            ) order_lines ON TRUE
+            WHERE {' AND '.join(conditions)}
+            ORDER BY base_order.update_time DESC, base_order.id DESC
+            {query_limit}
+        """
+        return query, query_params
 
-                order['products'] = result_order_product_details
+    @classmethod
+    def get_full_data(cls, start_date, end_date, order_status=None, user_id=None, page_cursor=None, limit=None):
+        query, query_params = cls.get_full_data_query(start_date, end_date, order_status, user_id, page_cursor,
+                                                      None if limit is None else limit + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(query, query_params)
+            result_orders = dictfetchall(cursor)
 
+        next_cursor = None
+        if limit is not None and len(result_orders) > limit:
+            result_orders = result_orders[:limit]
+            next_cursor = encode_cursor({
+                'sort': 'update_time',
+                'dir': 'desc',
+                'direction': 'next',
+                'value': result_orders[-1]['update_time'],
+                'id': result_orders[-1]['id'],
+            })
+        for order in result_orders:
+            del order['update_time']
+
+        if limit is None:
             return result_orders
+        return {
+            'next': next_cursor,
+            'results': result_orders,
+        }
+
+    @classmethod
+    def reserve_stock(cls, cursor, products):
+        amounts = {}
+        for product_data in products:
+            amounts[product_data['telephone_id']] = amounts.get(product_data['telephone_id'], 0) + product_data['amount']
+        telephone_ids = sorted(amounts)
+
+        cursor.execute("""
+            SELECT id, number_stock, effective_price
+            FROM base_telephone
+            WHERE id = ANY(%s)
+            ORDER BY id
+            FOR UPDATE;
+        """, [telephone_ids])
+        locked = {row[0]: row[1:] for row in cursor.fetchall()}
+        for telephone_id in telephone_ids:
+            if telephone_id not in locked:
+                raise Exception(f"No product found with ID {telephone_id}")
+
+        short = [telephone_id for telephone_id in telephone_ids if locked[telephone_id][0] < amounts[telephone_id]]
+        if not short:
+            cursor.execute("""
+                UPDATE base_telephone
+                SET number_stock = base_telephone.number_stock - batch.amount, update_time = %s
+                FROM unnest(%s::bigint[], %s::integer[]) AS batch (id, amount)
+                WHERE base_telephone.id = batch.id AND base_telephone.number_stock >= batch.amount
+                RETURNING base_telephone.id;
+            """, [timezone.now(), telephone_ids, [amounts[telephone_id] for telephone_id in telephone_ids]])
+            short = sorted(set(telephone_ids) - {row[0] for row in cursor.fetchall()})
+        if short:
+            raise ValidationError("There are not enough items in stock to complete the operation",
+                                  code='stock_error', params={'telephone_id': short})
+
+        catalog_listing.refresh_stock(telephone_ids)
+        return {telephone_id: locked[telephone_id][1] for telephone_id in telephone_ids}
 
     @classmethod
     def post(cls, validated_data):
-        with transaction.atomic():
-            try:
-                with connection.cursor() as cursor:
-                    address_query = """
-                            INSERT INTO base_address (street_name, city_id, post_code)
-                            VALUES (%s, %s, %s)
-                            RETURNING id;
-                        """
-                    cursor.execute(address_query, (
-                        validated_data['address']['street_name'],
-                        validated_data['address']['city_id'],
-                        validated_data['address']['post_code']
-                    ))
-                    address_result = cursor.fetchone()
-                    if not address_result:
-                        raise Exception("Failed to insert address")
-                    address_id = address_result[0]
-
-                    product_prices = {}
-                    for product_data in validated_data['products']:
-                        Telephone.edit_amount(product_data['telephone_id'], -product_data['amount'])
-                        print(-product_data['amount'])
-                        product_price_query = """
-                            SELECT price, discount FROM base_telephone WHERE id = %s;
-                        """
-                        cursor.execute(product_price_query, (product_data['telephone_id'],))
-                        product_result = cursor.fetchone()
-                        if not product_result:
-                            raise Exception(f"No product found with ID {product_data['telephone_id']}")
-
-                        product_price = product_result[0]
-                        discount_percentage = product_result[1]
-
-                        if discount_percentage is not None and discount_percentage > 0:
-                            discount_amount = product_price * (discount_percentage / 100)
-                            product_price -= discount_amount
-
-                        product_prices[product_data['telephone_id']] = product_price
-
-                    order_query = """
-                            INSERT INTO base_order (
-                                user_id, 
-                                address_id, 
-                                status, 
-                                created_time, 
-                                update_time, 
-                                first_name, 
-                                second_name,
-                                surname
-                            )
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                            RETURNING id;
-                        """
-                    cursor.execute(order_query, (
-                        validated_data['user_id'],
-                        address_id,
-                        'PENDING',
-                        timezone.now(),
-                        timezone.now(),
-                        validated_data['first_name'],
-                        validated_data['second_name'],
-                        validated_data['surname']
-                    ))
-                    fetch_result = cursor.fetchone()
-                    if not fetch_result:
-                        raise Exception("Failed to insert order")
-                    order_id = fetch_result[0]
-
-                    for product_data in validated_data['products']:
-                        product_query = """
-                                INSERT INTO base_order_product_details (
-                                    order_id, 
-                                    telephone_id, 
-                                    price, 
-                                    amount, 
-                                    created_time
-                                )
-                                VALUES (%s, %s, %s, %s, %s);
-                            """
-                        cursor.execute(product_query, (
-                            order_id,
-                            product_data['telephone_id'],
-                            product_prices[product_data['telephone_id']],
-                            product_data['amount'],
-                            timezone.now()
-                        ))
-
-                    return Order.get_item(order_id)
-            except Exception as e:
-                write_error_to_file('POST_GetPostOrderAPIView', e)
-                raise e
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                try:
+                    product_prices = cls.reserve_stock(cursor, validated_data['products'])
+                except ValidationError as e:
+                    transaction.set_rollback(True)
+                    return {'error': e.message, 'telephone_id': e.params['telephone_id']}
+
+                address_query = """
+                        INSERT INTO base_address (street_name, city_id, post_code)
+                        VALUES (%s, %s, %s)
+                        RETURNING id;
+                    """
+                cursor.execute(address_query, (
+                    validated_data['address']['street_name'],
+                    validated_data['address']['city_id'],
+                    validated_data['address']['post_code']
+                ))
+                address_result = cursor.fetchone()
+                if not address_result:
+                    raise Exception("Failed to insert address")
+                address_id = address_result[0]
+
+                order_query = """
+                        INSERT INTO base_order (
+                            user_id, 
+                            address_id, 
+                            status, 
+                            created_time, 
+                            update_time, 
+                            first_name, 
+                            second_name,
+                            surname,
+                            total_price,
+                            items_count
+                        )
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id;
+                    """
+                cursor.execute(order_query, (
+                    validated_data['user_id'],
+                    address_id,
+                    'PENDING',
+                    timezone.now(),
+                    timezone.now(),
+                    validated_data['first_name'],
+                    validated_data['second_name'],
+                    validated_data['surname'],
+                    sum(product_prices[product_data['telephone_id']] * product_data['amount']
+                        for product_data in validated_data['products']),
+                    sum(product_data['amount'] for product_data in validated_data['products'])
+                ))
+                fetch_result = cursor.fetchone()
+                if not fetch_result:
+                    raise Exception("Failed to insert order")
+                order_id = fetch_result[0]
+
+                created_time = timezone.now()
+                placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(validated_data['products']))
+                product_query = f"""
+                        INSERT INTO base_order_product_details (
+                            order_id, 
+                            telephone_id, 
+                            price, 
+                            amount, 
+                            created_time
+                        )
+                        VALUES {placeholders};
+                    """
+                product_params = []
+                for product_data in validated_data['products']:
+                    product_params += [
+                        order_id,
+                        product_data['telephone_id'],
+                        product_prices[product_data['telephone_id']],
+                        product_data['amount'],
+                        created_time
+                    ]
+                cursor.execute(product_query, product_params)
+
+                return Order.get_item(order_id)
+        except Exception as e:
+            write_error_to_file('POST_GetPostOrderAPIView', e)
+            raise e
 
     @classmethod
-    def get_all(cls, start_date, end_date, user_id=None):
+    def refresh_totals(cls, order_ids):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE base_order
+                SET total_price = COALESCE(order_lines.total_price, 0),
+                    items_count = COALESCE(order_lines.items_count, 0)
+                FROM unnest(%s::bigint[]) AS changed (id)
+                LEFT JOIN LATERAL (
+                    SELECT
+                        SUM(base_order_product_details.amount * base_order_product_details.price) AS total_price,
+                        SUM(base_order_product_details.amount) AS items_count
+                    FROM base_order_product_details
+                    WHERE base_order_product_details.order_id = changed.id
+                ) order_lines ON TRUE
+                WHERE base_order.id = changed.id;
+            """, [list(order_ids)])
+
+    @classmethod
+    def reconcile_totals(cls, repair=False):
+        query = """
+            SELECT
+                base_order.id AS id,
+                base_order.total_price AS stored_total_price,
+                COALESCE(order_lines.total_price, 0) AS total_price,
+                base_order.items_count AS stored_items_count,
+                COALESCE(order_lines.items_count, 0) AS items_count
+            FROM base_order
+            LEFT JOIN (
+                SELECT
+                    order_id,
+                    SUM(amount * price) AS total_price,
+                    SUM(amount) AS items_count
+                FROM base_order_product_details
+                GROUP BY order_id
+            ) order_lines ON order_lines.order_id = base_order.id
+            WHERE base_order.total_price <> COALESCE(order_lines.total_price, 0)
+                OR base_order.items_count <> COALESCE(order_lines.items_count, 0)
+            ORDER BY base_order.id
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            if repair:
+                query += " FOR UPDATE OF base_order"
+            cursor.execute(query)
+            drifted = dictfetchall(cursor)
+            if repair and drifted:
+                cls.refresh_totals([order['id'] for order in drifted])
+        return drifted
+
+    @classmethod
+    def get_all(cls, start_date, end_date, user_id=None, order_status=None, page_cursor=None, limit=None):
+        conditions, query_params = cls._get_order_conditions(start_date, end_date, order_status, user_id)
+        if page_cursor:
+            position = decode_cursor(page_cursor)
+            if position['sort'] != 'update_time' or position['direction'] != 'next':
+                raise ValueError('Cursor does not match the requested sort')
+            conditions.append("(base_order.update_time, base_order.id) < (%s, %s)")
+            query_params += [position['value'], position['id']]
+        query_limit = ""
+        if limit is not None:
+            query_limit = "LIMIT %s"
+            query_params.append(limit + 1)
+
         with connection.cursor() as cursor:
             query = f"""
             SELECT
@@ -949,21 +1595,40 @@ class Order(models.Model):
                 base_address.street_name AS street,
                 base_address.post_code AS post_code,
                 base_city.name AS city,
-                (
-                    SELECT SUM(base_order_product_details.amount * base_order_product_details.price)
-                    FROM base_order_product_details
-                    WHERE base_order_product_details.order_id = base_order.id
-                ) AS full_price
+                base_order.total_price AS full_price,
+                base_order.items_count AS items_count,
+                base_order.update_time AS position
             FROM base_order
             JOIN base_address
                 ON base_order.address_id = base_address.id
             JOIN base_city
                 ON base_address.city_id = base_city.id
-            ORDER BY base_order.update_time DESC
+            WHERE {' AND '.join(conditions)}
+            ORDER BY base_order.update_time DESC, base_order.id DESC
+            {query_limit}
             """
-            cursor.execute(query)
+            cursor.execute(query, query_params)
             result = dictfetchall(cursor)
+
+        next_cursor = None
+        if limit is not None and len(result) > limit:
+            result = result[:limit]
+            next_cursor = encode_cursor({
+                'sort': 'update_time',
+                'dir': 'desc',
+                'direction': 'next',
+                'value': result[-1]['position'],
+                'id': result[-1]['id'],
+            })
+        for order in result:
+            del order['position']
+
+        if limit is None:
             return result
+        return {
+            'next': next_cursor,
+            'results': result,
+        }
 
     @classmethod
     def get_item(cls, order_id):
@@ -978,11 +1643,8 @@ class Order(models.Model):
                    base_order.second_name,
                    base_address.street_name AS street,
                    base_address.post_code AS post_code,
-                   (
-                    SELECT SUM(base_order_product_details.amount * base_order_product_details.price)
-                    FROM base_order_product_details
-                    WHERE base_order_product_details.order_id = base_order.id
-                    ) AS full_price
+                   base_order.total_price AS full_price,
+                   base_order.items_count AS items_count
                FROM base_order
                JOIN base_address ON base_order.address_id = base_address.id
                JOIN auth_user ON base_order.user_id = auth_user.id
@@ -1018,11 +1680,8 @@ class Order(models.Model):
                         base_order.second_name,
                         base_address.street_name AS street,
                         base_address.post_code AS post_code,
-                        (
-                        SELECT SUM(base_order_product_details.amount * base_order_product_details.price)
-                        FROM base_order_product_details
-                        WHERE base_order_product_details.order_id = base_order.id
-                        ) AS full_price
+                        base_order.total_price AS full_price,
+                        base_order.items_count AS items_count
                     FROM base_order 
                     JOIN base_address ON base_order.address_id = base_address.id
                     JOIN auth_user ON base_order.user_id = auth_user.id
@@ -1034,6 +1693,46 @@ class Order(models.Model):
             return data
         return None
 
+    @classmethod
+    def cancel(cls, order_ids):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE base_order
+                SET status = 'CANCELED', update_time = %s
+                WHERE id = ANY(%s) AND status <> 'CANCELED'
+                RETURNING id;
+            """, [timezone.now(), list(order_ids)])
+            canceled = sorted(row[0] for row in cursor.fetchall())
+            if not canceled:
+                return canceled
+
+            cursor.execute("""
+                SELECT telephone_id, SUM(amount)
+                FROM base_order_product_details
+                WHERE order_id = ANY(%s)
+                GROUP BY telephone_id
+                ORDER BY telephone_id;
+            """, [canceled])
+            restock = cursor.fetchall()
+            if restock:
+                telephone_ids = [row[0] for row in restock]
+                cursor.execute("""
+                    SELECT id
+                    FROM base_telephone
+                    WHERE id = ANY(%s)
+                    ORDER BY id
+                    FOR UPDATE;
+                """, [telephone_ids])
+                values = ', '.join(['(%s::bigint, %s::integer)'] * len(restock))
+                cursor.execute(f"""
+                    UPDATE base_telephone
+                    SET number_stock = base_telephone.number_stock + restock.amount, update_time = %s
+                    FROM (VALUES {values}) AS restock (id, amount)
+                    WHERE base_telephone.id = restock.id;
+                """, [timezone.now()] + [value for row in restock for value in row])
+                catalog_listing.refresh_stock(telephone_ids)
+        return canceled
+
     @classmethod
     def patch(cls, item_id, data):
 
@@ -1057,6 +1756,8 @@ class Order(models.Model):
 
         try:
             with transaction.atomic():
+                if item_data.get('status') == 'CANCELED':
+                    cls.cancel([item_id])
                 set_clause = ", ".join(f"{field} = %s" for field in item_data.keys())
                 table_name = cls._meta.db_table  # Get the correct table name
                 query = f"""
@@ -1079,19 +1780,9 @@ class Order(models.Model):
             query = """
                 SELECT
                     DATE(base_order.created_time) AS date,
-                    AVG(
-                        (
-                            SELECT SUM(base_order_product_details.amount * base_order_product_details.price)
-                            FROM base_order_product_details
-                            WHERE base_order_product_details.order_id = base_order.id
-                        )
-                    ) AS value
+                    AVG(base_order.total_price) AS value
                 FROM
                     base_order
-                JOIN
-                    base_address ON base_order.address_id = base_address.id
-                JOIN
-                    base_city ON base_address.city_id = base_city.id
                 WHERE
                     DATE(base_order.created_time) BETWEEN %s AND %s
                 GROUP BY
@@ -1107,11 +1798,9 @@ class Order(models.Model):
             query = """
                 SELECT
                     DATE(base_order.created_time) AS DATE,
-                    SUM(base_order_product_details.amount) AS VALUE
+                    SUM(base_order.items_count) AS VALUE
                 FROM
                     base_order
-                JOIN
-                    base_order_product_details ON base_order.id = base_order_product_details.order_id
                 WHERE
                     DATE(base_order.created_time) BETWEEN %s AND %s
                 GROUP BY
@@ -1150,19 +1839,9 @@ class Order(models.Model):
             query = """
                 SELECT
                     DATE(base_order.created_time) AS date,
-                    SUM(
-                        (
-                            SELECT SUM(base_order_product_details.amount * base_order_product_details.price)
-                            FROM base_order_product_details
-                            WHERE base_order_product_details.order_id = base_order.id
-                        )
-                    ) AS value
+                    SUM(base_order.total_price) AS value
                 FROM
                     base_order
-                JOIN
-                    base_address ON base_order.address_id = base_address.id
-                JOIN
-                    base_city ON base_address.city_id = base_city.id
                 WHERE
                     DATE(base_order.created_time) BETWEEN %s AND %s
                 GROUP BY
@@ -1183,6 +1862,90 @@ class order_product_details(models.Model):
     created_time = models.DateTimeField(auto_now_add=True, verbose_name='created_time')
 
 
+class order_idempotency_key(models.Model):
+    key = models.CharField(max_length=255, unique=True)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.IntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=JSONEncoder)
+    created_time = models.DateTimeField(verbose_name='created_time')
+    expires_time = models.DateTimeField(db_index=True, verbose_name='expires_time')
+
+    @classmethod
+    def acquire(cls, cursor, key, request_hash):
+        now = timezone.now()
+        cursor.execute("""
+            INSERT INTO base_order_idempotency_key (
+                key,
+                request_hash,
+                response_status,
+                response_body,
+                created_time,
+                expires_time
+            )
+            VALUES (%s, %s, NULL, NULL, %s, %s)
+            ON CONFLICT (key) DO UPDATE SET
+                request_hash = EXCLUDED.request_hash,
+                response_status = NULL,
+                response_body = NULL,
+                created_time = EXCLUDED.created_time,
+                expires_time = EXCLUDED.expires_time
+            WHERE base_order_idempotency_key.expires_time <= %s
+            RETURNING id;
+        """, [key, request_hash, now, now + timedelta(seconds=ORDER_IDEMPOTENCY_KEY_TTL), now])
+        if cursor.fetchone():
+            return None
+        cursor.execute("""
+            SELECT request_hash, response_status, response_body
+            FROM base_order_idempotency_key
+            WHERE key = %s;
+        """, [key])
+        request_hash, response_status, response_body = cursor.fetchone()
+        if isinstance(response_body, str):
+            response_body = json.loads(response_body)
+        return {
+            'request_hash': request_hash,
+            'status': response_status,
+            'body': response_body,
+        }
+
+    @classmethod
+    def store(cls, cursor, key, response_status, response_body):
+        cursor.execute("""
+            UPDATE base_order_idempotency_key
+            SET response_status = %s, response_body = %s
+            WHERE key = %s;
+        """, [response_status, json.dumps(response_body, cls=JSONEncoder), key])
+
+    @classmethod
+    def purge_expired(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM base_order_idempotency_key WHERE expires_time <= %s;", [timezone.now()])
+            return cursor.rowcount
+
+
+class order_intake(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'QUEUED'),
+        ('DONE', 'DONE'),
+        ('FAILED', 'FAILED'),
+    ]
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    user = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    payload = models.JSONField(encoder=JSONEncoder)
+    order = models.ForeignKey(Order, null=True, on_delete=models.SET_NULL)
+    error = models.JSONField(null=True, encoder=JSONEncoder)
+    attempts = models.IntegerField(default=0)
+    created_time = models.DateTimeField(verbose_name='created_time')
+    finished_time = models.DateTimeField(null=True, verbose_name='finished_time')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(status='QUEUED'), name='base_order_intake_queued_idx'),
+            models.Index(fields=['finished_time'], name='base_order_intake_finish_idx'),
+        ]
+
+
 class Comment(models.Model):
     telephone = models.ForeignKey(Telephone, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -1643,9 +2406,14 @@ class wish_list(models.Model):
     def get_by_user_id(cls, user_id):
         with connection.cursor() as cursor:
             query = """
-                    SELECT *
+                    SELECT
+                        base_wish_list.*,
+                        base_telephone.title,
+                        base_telephone.price,
+                        base_telephone.cover_image
                     FROM base_wish_list
-                    WHERE user_id = %s
+                    JOIN base_telephone ON base_wish_list.telephone_id = base_telephone.id
+                    WHERE base_wish_list.user_id = %s
                 """
             cursor.execute(query, [user_id])
             result = dictfetchall(cursor)
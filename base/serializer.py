@@ -4,6 +4,7 @@ from django.contrib.auth.hashers import make_password
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .const import ORDER_BULK_CANCEL_MAX
 
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -26,7 +27,7 @@ class GetAllTelephoneSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Telephone
-        fields = ['id', 'title', 'price', 'brand', 'images']
+        fields = ['id', 'title', 'price', 'brand', 'images', 'cover_image']
 
 
 class TelephoneSerializer(serializers.ModelSerializer):
@@ -126,7 +127,7 @@ class AddressSerializer(serializers.ModelSerializer):
 
 class OrderProductsSerializer(serializers.ModelSerializer):
     telephone_id = serializers.IntegerField()
-    amount = serializers.IntegerField()
+    amount = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = order_product_details
@@ -138,7 +139,7 @@ class OrderSerializerAuthUser(serializers.ModelSerializer):
     second_name = serializers.CharField(max_length=50)
     surname = serializers.CharField(max_length=50)
     address = AddressSerializer()
-    products = OrderProductsSerializer(many=True)  # Include products here
+    products = OrderProductsSerializer(many=True, allow_empty=False)  # Include products here
 
     class Meta:
         model = Order
@@ -153,13 +154,17 @@ class OrderSerializerNoAuthUser(serializers.ModelSerializer):
     email = serializers.EmailField()
     number_telephone = serializers.CharField()
     address = AddressSerializer()
-    products = OrderProductsSerializer(many=True)
+    products = OrderProductsSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = User
         fields = ['id', 'first_name', 'second_name', 'surname', 'email', 'address', 'number_telephone', 'products']
 
 
+class OrderBulkCancelSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=ORDER_BULK_CANCEL_MAX)
+
+
 class VendorSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(max_length=50, required=True)
     second_name = serializers.CharField(max_length=50, required=True)
@@ -1,7 +1,10 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from .models import UserProfile
+from .images import build_image_variants, variants_match
+from .models import UserProfile, Telephone, TelephoneImage, Brand, Order, order_product_details, catalog_listing, \
+    catalog_version
+from .utils import parse_memory_gb
 
 
 @receiver(post_save, sender=User)
@@ -13,3 +16,57 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.userprofile.save()
+
+
+@receiver(pre_save, sender=Telephone)
+def normalize_telephone_memory(sender, instance, **kwargs):
+    instance.memory_gb = parse_memory_gb(instance.built_in_memory)
+
+
+@receiver(post_save, sender=Telephone)
+def refresh_catalog_listing_telephone(sender, instance, **kwargs):
+    catalog_listing.refresh([instance.id])
+
+
+@receiver(pre_delete, sender=Telephone)
+def lock_deleted_telephone(sender, instance, **kwargs):
+    list(Telephone.objects.select_for_update().filter(id=instance.id).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Telephone)
+def bump_catalog_version_telephone(sender, instance, **kwargs):
+    catalog_version.bump()
+
+
+@receiver(post_save, sender=Brand)
+def refresh_catalog_listing_brand(sender, instance, **kwargs):
+    catalog_listing.refresh(brand_id=instance.id)
+
+
+@receiver(post_delete, sender=Brand)
+def bump_catalog_version_brand(sender, instance, **kwargs):
+    catalog_version.bump()
+
+
+@receiver(post_save, sender=TelephoneImage)
+def build_telephone_image_variants(sender, instance, **kwargs):
+    if instance.image and not variants_match(instance.image.name, instance.variants):
+        instance.variants = build_image_variants(instance.image.name)
+        TelephoneImage.set_variants(instance.id, instance.variants)
+
+
+@receiver(post_save, sender=TelephoneImage)
+@receiver(post_delete, sender=TelephoneImage)
+def refresh_catalog_listing_images(sender, instance, origin=None, **kwargs):
+    if getattr(origin, 'model', type(origin)) in (Telephone, Brand):
+        return
+    TelephoneImage.refresh_cover_image([instance.telephone_id])
+    catalog_listing.refresh([instance.telephone_id])
+
+
+@receiver(post_save, sender=order_product_details)
+@receiver(post_delete, sender=order_product_details)
+def refresh_order_totals(sender, instance, origin=None, **kwargs):
+    if getattr(origin, 'model', type(origin)) is Order:
+        return
+    Order.refresh_totals([instance.order_id])
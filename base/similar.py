@@ -0,0 +1,119 @@
+import threading
+
+import numpy as np
+from django.db import connection
+
+from base.cache import catalog_version_check
+
+FEATURES = ('diagonal_screen', 'memory_gb', 'weight', 'price')
+FEATURE_WEIGHTS = np.array([1.0, 1.0, 0.5, 1.5])
+BRAND_WEIGHT = 1.0
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._raw = np.empty((0, len(FEATURES)))
+        self._brands = np.empty(0, dtype=np.int64)
+        self._brand_codes = {}
+        self._positions = {}
+        self._normalized = None
+
+    def sync(self):
+        version = catalog_version_check.get()
+        if version == self._version:
+            return version
+        with self._lock:
+            if version == self._version:
+                return version
+            query = """
+                SELECT telephone_id, brand_title, diagonal_screen, memory_gb, weight, price
+                FROM base_catalog_listing
+            """
+            with connection.cursor() as cursor:
+                if self._version is None:
+                    cursor.execute(query)
+                    changed = cursor.fetchall()
+                    existing_ids = None
+                else:
+                    cursor.execute(query + " WHERE version > %s", [self._version])
+                    changed = cursor.fetchall()
+                    cursor.execute("SELECT telephone_id FROM base_catalog_listing")
+                    existing_ids = {row[0] for row in cursor.fetchall()}
+
+            if existing_ids is not None:
+                for telephone_id in set(self._positions) - existing_ids:
+                    self._remove(telephone_id)
+            self._upsert(changed)
+            self._normalized = None
+            self._version = version
+        return version
+
+    def _upsert(self, rows):
+        new_rows = []
+        for telephone_id, brand, *features in rows:
+            features = [np.nan if value is None else float(value) for value in features]
+            brand_code = self._brand_codes.setdefault(brand, len(self._brand_codes))
+            position = self._positions.get(telephone_id)
+            if position is None:
+                new_rows.append((telephone_id, brand_code, features))
+            else:
+                self._raw[position] = features
+                self._brands[position] = brand_code
+        if new_rows:
+            start = len(self._ids)
+            self._ids = np.concatenate([self._ids, [row[0] for row in new_rows]])
+            self._brands = np.concatenate([self._brands, [row[1] for row in new_rows]])
+            self._raw = np.vstack([self._raw, [row[2] for row in new_rows]])
+            for offset, row in enumerate(new_rows):
+                self._positions[row[0]] = start + offset
+
+    def _remove(self, telephone_id):
+        position = self._positions.pop(telephone_id)
+        last = len(self._ids) - 1
+        if position != last:
+            moved_id = int(self._ids[last])
+            self._ids[position] = self._ids[last]
+            self._brands[position] = self._brands[last]
+            self._raw[position] = self._raw[last]
+            self._positions[moved_id] = position
+        self._ids = self._ids[:last]
+        self._brands = self._brands[:last]
+        self._raw = self._raw[:last]
+
+    def _get_normalized(self):
+        if self._normalized is None:
+            raw = self._raw.copy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                raw[:, 1] = np.log2(raw[:, 1])
+            raw[~np.isfinite(raw)] = np.nan
+            known = ~np.isnan(raw)
+            counts = known.sum(axis=0)
+            means = np.divide(np.nansum(raw, axis=0), counts, out=np.zeros(len(FEATURES)), where=counts > 0)
+            raw = np.where(known, raw, means)
+            stds = raw.std(axis=0)
+            stds[stds == 0] = 1.0
+            self._normalized = (raw - means) / stds * np.sqrt(FEATURE_WEIGHTS)
+        return self._normalized
+
+    def get_similar(self, telephone_id, k):
+        self.sync()
+        with self._lock:
+            position = self._positions.get(telephone_id)
+            if position is None:
+                return None
+            normalized = self._get_normalized()
+            distances = ((normalized - normalized[position]) ** 2).sum(axis=1)
+            distances += BRAND_WEIGHT * (self._brands != self._brands[position])
+            distances[position] = np.inf
+            k = min(k, len(distances) - 1)
+            if k <= 0:
+                return []
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+            return [(int(self._ids[index]), float(distances[index])) for index in nearest]
+
+
+similarity_index = SimilarityIndex()
@@ -0,0 +1,57 @@
+import re
+import threading
+import weakref
+
+from django.db import connection
+
+
+def to_positional(query):
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        count += 1
+        return f"${count}"
+
+    return re.sub(r'(?<!%)%s', replace, query).replace('%%', '%'), count
+
+
+class PreparedStatements:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prepared = weakref.WeakKeyDictionary()
+        self.prepares = 0
+        self.executions = 0
+
+    def execute(self, cursor, name, query, params, types=None):
+        connection.ensure_connection()
+        raw_connection = connection.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(raw_connection, set())
+        if name not in prepared:
+            statement, count = to_positional(query)
+            if count != len(params):
+                raise ValueError(f"Statement {name} expects {count} parameters, got {len(params)}")
+            if types:
+                cursor.execute(f"PREPARE {name} ({', '.join(types)}) AS {statement}")
+            else:
+                cursor.execute(f"PREPARE {name} AS {statement}")
+            prepared.add(name)
+            self.prepares += 1
+        placeholders = ', '.join(['%s'] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}", params)
+        self.executions += 1
+
+    def stats(self):
+        with self._lock:
+            connections = len(self._prepared)
+            statements = sum(len(names) for names in self._prepared.values())
+        return {
+            'connections': connections,
+            'statements': statements,
+            'prepares': self.prepares,
+            'executions': self.executions,
+        }
+
+
+prepared_statements = PreparedStatements()
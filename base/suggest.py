@@ -0,0 +1,130 @@
+import sys
+import threading
+from bisect import bisect_left, insort
+
+from django.db import connection
+
+from base.const import SUGGEST_SCAN_LIMIT
+from base.cache import catalog_version_check
+from base.utils import write_error_to_file
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = []
+        self._titles = {}
+        self._brands = {}
+
+    def warm(self):
+        try:
+            self.sync()
+        except Exception as e:
+            write_error_to_file('SuggestIndex.warm', e)
+
+    def sync(self):
+        version = catalog_version_check.get()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            query = "SELECT telephone_id, title, brand_title FROM base_catalog_listing"
+            with connection.cursor() as cursor:
+                if self._version is None:
+                    cursor.execute(query)
+                    changed = cursor.fetchall()
+                    existing_ids = None
+                else:
+                    cursor.execute(query + " WHERE version > %s", [self._version])
+                    changed = cursor.fetchall()
+                    cursor.execute("SELECT telephone_id FROM base_catalog_listing")
+                    existing_ids = {row[0] for row in cursor.fetchall()}
+
+            if existing_ids is not None:
+                for telephone_id in set(self._titles) - existing_ids:
+                    self._remove(telephone_id)
+            for telephone_id, title, brand in changed:
+                self._remove(telephone_id)
+                self._add(telephone_id, title, brand)
+            self._version = version
+
+    @staticmethod
+    def _entries(kind, entry_id, title):
+        words = normalize(title).split(' ')
+        return [(' '.join(words[offset:]), offset, kind, entry_id) for offset in range(len(words))]
+
+    def _add(self, telephone_id, title, brand):
+        self._titles[telephone_id] = (title, brand)
+        for entry in self._entries('telephone', telephone_id, title):
+            insort(self._keys, entry)
+        count = self._brands.get(brand, 0)
+        if not count:
+            for entry in self._entries('brand', brand, brand):
+                insort(self._keys, entry)
+        self._brands[brand] = count + 1
+
+    def _remove(self, telephone_id):
+        if telephone_id not in self._titles:
+            return
+        title, brand = self._titles.pop(telephone_id)
+        for entry in self._entries('telephone', telephone_id, title):
+            del self._keys[bisect_left(self._keys, entry)]
+        self._brands[brand] -= 1
+        if not self._brands[brand]:
+            del self._brands[brand]
+            for entry in self._entries('brand', brand, brand):
+                del self._keys[bisect_left(self._keys, entry)]
+
+    def suggest(self, query, limit):
+        self.sync()
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        matches = {}
+        with self._lock:
+            start = bisect_left(self._keys, (prefix,))
+            for key, offset, kind, entry_id in self._keys[start:start + SUGGEST_SCAN_LIMIT]:
+                if not key.startswith(prefix):
+                    break
+                if (kind, entry_id) not in matches or offset < matches[(kind, entry_id)]:
+                    matches[(kind, entry_id)] = offset
+            titles = {
+                (kind, entry_id): entry_id if kind == 'brand' else self._titles[entry_id][0]
+                for kind, entry_id in matches
+            }
+
+        ranked = sorted(matches, key=lambda match: (matches[match], match[0] != 'brand', len(titles[match]),
+                                                    titles[match]))
+        return [
+            {'type': kind, 'id': None if kind == 'brand' else entry_id, 'title': titles[(kind, entry_id)]}
+            for kind, entry_id in ranked[:limit]
+        ]
+
+    def stats(self):
+        with self._lock:
+            strings = {key for key, _, _, _ in self._keys}
+            footprint = (
+                sys.getsizeof(self._keys)
+                + sum(sys.getsizeof(entry) for entry in self._keys)
+                + sum(sys.getsizeof(key) for key in strings)
+                + sys.getsizeof(self._titles)
+                + sum(sys.getsizeof(title) for title, _ in self._titles.values())
+                + sys.getsizeof(self._brands)
+            )
+            return {
+                'version': self._version,
+                'version_checks': catalog_version_check.checks,
+                'telephones': len(self._titles),
+                'brands': len(self._brands),
+                'keys': len(self._keys),
+                'bytes': footprint,
+            }
+
+
+suggest_index = SuggestIndex()
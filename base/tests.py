@@ -1,3 +1,313 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase
+
+from base.cache import CatalogCache
+from base.facets import FacetIndex
+from base.management.commands.stress_order_reservation import Command as StressOrderReservationCommand
+from base.models import Order
+from base.suggest import SuggestIndex
+from base.utils import parse_memory_gb, encode_cursor, decode_cursor
+
+
+class ParseMemoryGbTests(SimpleTestCase):
+    def test_half_rounds_away_from_zero_like_the_backfill(self):
+        self.assertEqual(parse_memory_gb('512MB'), 1)
+        self.assertEqual(parse_memory_gb('2.5GB'), 3)
+        self.assertEqual(parse_memory_gb('0.5 gb'), 1)
+
+    def test_below_half_rounds_down(self):
+        self.assertEqual(parse_memory_gb('511MB'), 0)
+        self.assertEqual(parse_memory_gb('1.49GB'), 1)
+
+    def test_units(self):
+        self.assertEqual(parse_memory_gb('128'), 128)
+        self.assertEqual(parse_memory_gb('1TB'), 1024)
+        self.assertIsNone(parse_memory_gb('unknown'))
+        self.assertIsNone(parse_memory_gb(None))
+
+
+class FacetIndexTests(SimpleTestCase):
+    ROWS = (
+        (1, 6.1, '128GB', 'Apple', 1000, 170.0, 128, 900),
+        (2, 6.1, '256GB', 'Apple', 1200, 175.0, 256, 1200),
+        (3, 6.7, '128GB', 'Samsung', 800, 190.0, 128, 800),
+        (4, 6.7, '512GB', 'Samsung', 1500, 200.0, 512, 1400),
+    )
+
+    def setUp(self):
+        self.index = FacetIndex()
+        for row in self.ROWS:
+            self.index._add(row)
+        patcher = mock.patch.object(self.index, 'sync')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def counts(result, facet):
+        items = {item['title']: item['options'] for item in result['items']}
+        return {option['value']: option['count'] for option in items[facet]}
+
+    def test_without_filters_counts_every_telephone(self):
+        result = self.index.get_facets()
+        self.assertEqual(result['count'], 4)
+        self.assertEqual(self.counts(result, 'brand'), {'Apple': 2, 'Samsung': 2})
+        self.assertEqual(list(self.counts(result, 'built_in_memory')), ['128GB', '256GB', '512GB'])
+        self.assertEqual(result['price_range'], {'min_price': 800, 'max_price': 1500})
+
+    def test_selected_facet_does_not_narrow_its_own_counts(self):
+        result = self.index.get_facets(brand=['Apple'])
+        self.assertEqual(result['count'], 2)
+        self.assertEqual(self.counts(result, 'brand'), {'Apple': 2, 'Samsung': 2})
+        self.assertEqual(self.counts(result, 'diagonal_screen'), {6.1: 2, 6.7: 0})
+        self.assertEqual(self.counts(result, 'built_in_memory'), {'128GB': 1, '256GB': 1, '512GB': 0})
+        self.assertEqual(result['price_range'], {'min_price': 1000, 'max_price': 1200})
+
+    def test_other_selections_narrow_the_counts(self):
+        result = self.index.get_facets(brand=['Apple'], diagonal_screen=['6.7'])
+        self.assertEqual(result['count'], 0)
+        self.assertEqual(self.counts(result, 'brand'), {'Apple': 0, 'Samsung': 2})
+        self.assertEqual(self.counts(result, 'diagonal_screen'), {6.1: 2, 6.7: 0})
+
+    def test_range_filter_keeps_its_own_bounds(self):
+        result = self.index.get_facets(price_min=1000)
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(self.counts(result, 'brand'), {'Apple': 2, 'Samsung': 1})
+        self.assertEqual(result['price_range'], {'min_price': 800, 'max_price': 1500})
+        self.assertEqual(result['weight'], {'min': 170.0, 'max': 200.0})
+
+    def test_removed_telephone_drops_out_of_every_facet(self):
+        self.index._remove(4)
+        result = self.index.get_facets()
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(self.counts(result, 'built_in_memory'), {'128GB': 2, '256GB': 1})
+        self.assertEqual(result['price_range'], {'min_price': 800, 'max_price': 1200})
+
+
+class CatalogCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = CatalogCache(max_entries=2)
+        loads = []
+
+        def loader(key):
+            return lambda: loads.append(key) or key.upper()
+
+        cache.get_or_set('a', loader('a'), 1)
+        cache.get_or_set('b', loader('b'), 1)
+        self.assertEqual(cache.get_or_set('a', loader('a'), 1), 'A')
+        cache.get_or_set('c', loader('c'), 1)
+        cache.get_or_set('a', loader('a'), 1)
+        cache.get_or_set('b', loader('b'), 1)
+
+        self.assertEqual(loads, ['a', 'b', 'c', 'b'])
+        self.assertEqual(cache.stats()['evictions'], 2)
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_new_version_invalidates_entries(self):
+        cache = CatalogCache()
+        self.assertEqual(cache.get_or_set('a', lambda: 'old', 1), 'old')
+        self.assertEqual(cache.get_or_set('a', lambda: 'new', 2), 'new')
+        self.assertEqual(cache.get_or_set('a', lambda: 'newer', 2), 'new')
+        stats = cache.stats()
+        self.assertEqual((stats['version'], stats['invalidations'], stats['hits'], stats['misses']), (2, 1, 1, 2))
+
+    def test_value_loaded_for_an_old_version_is_not_stored(self):
+        cache = CatalogCache()
+
+        def loader():
+            cache.get_or_set('other', lambda: 'other', 2)
+            return 'stale'
+
+        self.assertEqual(cache.get_or_set('a', loader, 1), 'stale')
+        self.assertEqual(cache.get_or_set('a', lambda: 'fresh', 2), 'fresh')
+
+    def test_concurrent_misses_share_one_load(self):
+        cache = CatalogCache()
+        started = threading.Event()
+        release = threading.Event()
+        loads = []
+        results = {}
+
+        def loader(keys):
+            loads.append(list(keys))
+            started.set()
+            release.wait(5)
+            return {key: key * 2 for key in keys}
+
+        def request(name, keys):
+            results[name] = cache.get_or_set_many(keys, loader, 1)
+
+        first = threading.Thread(target=request, args=('first', [1, 2]))
+        first.start()
+        self.assertTrue(started.wait(5))
+        second = threading.Thread(target=request, args=('second', [2, 3]))
+        second.start()
+        deadline = time.monotonic() + 5
+        while cache.stats()['coalesced'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(loads, [[1, 2], [3]])
+        self.assertEqual(results, {'first': {1: 2, 2: 4}, 'second': {2: 4, 3: 6}})
+        self.assertEqual(cache.stats()['coalesced'], 1)
+
+    def test_failed_load_is_not_cached(self):
+        cache = CatalogCache()
+
+        def failing(keys):
+            raise RuntimeError('database is down')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_set_many(['a'], failing, 1)
+        self.assertEqual(cache.get_or_set_many(['a'], lambda keys: {'a': 'A'}, 1), {'a': 'A'})
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+
+class SuggestIndexTests(SimpleTestCase):
+    def sync(self, index, version, *results):
+        cursor = FakeCursor(list(results))
+        with mock.patch('base.suggest.catalog_version_check') as version_check, \
+                mock.patch('base.suggest.connection') as connection:
+            version_check.get.return_value = version
+            connection.cursor.return_value = cursor
+            index.sync()
+            return cursor
+
+    @staticmethod
+    def titles(index, query):
+        with mock.patch.object(index, 'sync'):
+            return [(item['type'], item['title']) for item in index.suggest(query, 10)]
+
+    def test_incremental_sync_adds_and_removes_prefixes(self):
+        index = SuggestIndex()
+        self.sync(index, 1, [(1, 'iPhone 15 Pro', 'Apple'), (2, 'Galaxy S24', 'Samsung')])
+        self.assertEqual(self.titles(index, 'pro'), [('telephone', 'iPhone 15 Pro')])
+        self.assertEqual(self.titles(index, 'app'), [('brand', 'Apple')])
+
+        cursor = self.sync(index, 2, [(3, 'Pixel 8 Pro', 'Google')], [(2,), (3,)])
+        self.assertEqual(cursor.queries[0][1], [1])
+        self.assertEqual(self.titles(index, 'pro'), [('telephone', 'Pixel 8 Pro')])
+        self.assertEqual(self.titles(index, 'app'), [])
+        self.assertEqual(self.titles(index, 'iphone'), [])
+        self.assertEqual(self.titles(index, 'g'), [('brand', 'Google'), ('telephone', 'Galaxy S24')])
+        self.assertEqual(index.stats()['keys'], 7)
+
+    def test_renamed_telephone_replaces_its_prefixes(self):
+        index = SuggestIndex()
+        self.sync(index, 1, [(1, 'Galaxy S24', 'Samsung')])
+        self.sync(index, 2, [(1, 'Galaxy S24 Ultra', 'Samsung')], [(1,)])
+        self.assertEqual(self.titles(index, 'galaxy'), [('telephone', 'Galaxy S24 Ultra')])
+        self.assertEqual(self.titles(index, 'ultra'), [('telephone', 'Galaxy S24 Ultra')])
+
+    def test_unchanged_version_skips_the_database(self):
+        index = SuggestIndex()
+        self.sync(index, 1, [(1, 'Galaxy S24', 'Samsung')])
+        cursor = self.sync(index, 1)
+        self.assertEqual(cursor.queries, [])
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        positions = (
+            {'sort': 'base_catalog_listing.title', 'dir': 'asc', 'direction': 'next', 'value': 'Galaxy S24',
+             'id': 7},
+            {'sort': 'base_catalog_listing.price', 'dir': 'desc', 'direction': 'prev', 'value': 1200, 'id': 3},
+            {'sort': 'rank', 'dir': 'desc', 'direction': 'next', 'value': 0.0607927, 'id': 12},
+            {'sort': 'update_time', 'dir': 'desc', 'direction': 'next', 'value': '2024-06-01 10:15:00+00:00',
+             'id': 40},
+        )
+        for position in positions:
+            with self.subTest(sort=position['sort']):
+                cursor = encode_cursor(position)
+                self.assertNotIn('=', cursor)
+                self.assertEqual(decode_cursor(cursor), position)
+
+    def test_garbage_is_rejected(self):
+        for cursor in ('not a cursor', encode_cursor([1, 2]), encode_cursor({'sort': 'rank'})):
+            with self.subTest(cursor=cursor):
+                with self.assertRaisesMessage(ValueError, 'Invalid cursor'):
+                    decode_cursor(cursor)
+
+    def test_values_are_checked_against_the_sort(self):
+        valid = {'sort': 'base_catalog_listing.price', 'dir': 'asc', 'direction': 'next', 'value': 1200, 'id': 3}
+        invalid = (
+            {'sort': 'base_catalog_listing.price; DROP TABLE base_order'},
+            {'sort': 'base_catalog_listing.number_stock'},
+            {'dir': 'sideways'},
+            {'direction': 'up'},
+            {'id': '3'},
+            {'id': True},
+            {'id': None},
+            {'value': '1200'},
+            {'value': [1200]},
+            {'value': False},
+            {'sort': 'base_catalog_listing.title', 'value': 12},
+            {'sort': 'update_time', 'dir': 'desc', 'value': 'yesterday'},
+        )
+        self.assertEqual(decode_cursor(encode_cursor(valid)), valid)
+        for change in invalid:
+            with self.subTest(change=change):
+                with self.assertRaisesMessage(ValueError, 'Invalid cursor'):
+                    decode_cursor(encode_cursor({**valid, **change}))
+
+
+class ReserveStockConcurrencyTests(TransactionTestCase):
+    STOCK = 20
+    WORKERS = 8
+    ATTEMPTS = 10
+
+    def test_concurrent_reservations_never_oversell(self):
+        telephone_ids = StressOrderReservationCommand.create_fixtures(3, self.STOCK)
+        products = [{'telephone_id': telephone_id, 'amount': 1} for telephone_id in reversed(telephone_ids)]
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(self.ATTEMPTS):
+                    try:
+                        with transaction.atomic(), connection.cursor() as cursor:
+                            Order.reserve_stock(cursor, products)
+                        outcome = 'reserved'
+                    except ValidationError:
+                        outcome = 'rejected'
+                    with outcomes_lock:
+                        outcomes.append(outcome)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT number_stock FROM base_telephone WHERE id = ANY(%s)", [telephone_ids])
+            final_stock = [row[0] for row in cursor.fetchall()]
+        self.assertEqual(len(outcomes), self.WORKERS * self.ATTEMPTS)
+        self.assertEqual(outcomes.count('reserved'), self.STOCK)
+        self.assertEqual(final_stock, [0, 0, 0])
@@ -4,8 +4,16 @@ from base.views import *
 
 urlpatterns = [
     path('/product/<int:id>', TelephoneGetItemPatchDeleteAPIView.as_view(), name='telephone'),
+    path('/product/<int:id>/similar', TelephoneSimilarAPIView.as_view(), name='telephone_similar'),
+    path('/product/stock', TelephoneStockAPIView.as_view(), name='telephone_stock'),
+    path('/product/compare', TelephoneCompareAPIView.as_view(), name='telephone_compare'),
+    path('/product/suggest', TelephoneSuggestAPIView.as_view(), name='telephone_suggest'),
+    path('/product/search', TelephoneSearchAPIView.as_view(), name='telephone_search'),
+    path('/product/import', TelephoneImportAPIView.as_view(), name='telephone_import'),
     path('/product', TelephoneGetPostAPIView.as_view(), name='telephones'),
     path('/filters', FiltersForTelephoneGetAPIView.as_view(), name='filters'),
+    path('/admin/catalog_cache', CatalogCacheStatsAPIView.as_view(), name='catalog_cache'),
+    path('/admin/suggest_index', SuggestIndexStatsAPIView.as_view(), name='suggest_index'),
 
     path('/product_by_ids', TelephoneGetListAPIView.as_view(), name='list_telephones'),
 
@@ -21,7 +29,11 @@ urlpatterns = [
     path('/user/<int:id>', UsersAdminGetItemPatchDeleteAPIView.as_view(), name='user_for_admin'),
 
     path('/order', OrderPostAPIView.as_view(), name='order'),
+    path('/order/intake/<uuid:token>', OrderIntakeGetAPIView.as_view(), name='order_intake'),
     path('/admin/order', OrderGetAPIView.as_view(), name='orders'),
+    path('/admin/order/export', OrderExportAPIView.as_view(), name='orders_export'),
+    path('/admin/order/intake', OrderIntakeStatsAPIView.as_view(), name='orders_intake'),
+    path('/admin/order/cancel', OrderBulkCancelAPIView.as_view(), name='orders_cancel'),
     path('/order/<int:id>', OrderGetItemPatchAPIView.as_view(), name='order'),
 
     path('/vendor', VendorGetPostAPIView.as_view(), name='vendors'),
@@ -1,5 +1,13 @@
+import base64
+import calendar
+import json
 import os
+import re
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
 
 
 def get_telephone_image_upload_path(instance, filename):
@@ -35,6 +43,10 @@ def dictfetchall(cursor):
     return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 
+def get_today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
 def get_last_month():
     datetime_now = datetime.now()
     year = datetime_now.year
@@ -42,7 +54,7 @@ def get_last_month():
     if month == 0:
         year -= 1
         month = 12
-    day = datetime_now.day
+    day = min(datetime_now.day, calendar.monthrange(year, month)[1])
 
     new_datetime = datetime(year, month, day).strftime('%Y-%m-%d')
     return new_datetime
@@ -62,4 +74,82 @@ def get_dates_with_null_values(result, start_date, end_date):
     # Convert the dictionary back to the desired list format
     final_result = [{'date': date, 'value': value} for date, value in result_dict.items()]
 
-    return final_result
\ No newline at end of file
+    return final_result
+
+
+CURSOR_VALUE_TYPES = {
+    'base_catalog_listing.title': str,
+    'base_catalog_listing.price': int,
+    'base_catalog_listing.effective_price': int,
+    'rank': (int, float),
+    'update_time': str,
+}
+
+
+def encode_cursor(position):
+    raw = json.dumps(position, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(position, dict) or not {'sort', 'dir', 'direction', 'value', 'id'} <= position.keys():
+        raise ValueError('Invalid cursor')
+    value_type = CURSOR_VALUE_TYPES.get(position['sort'])
+    if (value_type is None or position['dir'] not in ('asc', 'desc')
+            or position['direction'] not in ('next', 'prev')
+            or not isinstance(position['id'], int) or isinstance(position['id'], bool)
+            or not isinstance(position['value'], value_type) or isinstance(position['value'], bool)):
+        raise ValueError('Invalid cursor')
+    if position['sort'] == 'update_time':
+        try:
+            datetime.fromisoformat(position['value'])
+        except ValueError:
+            raise ValueError('Invalid cursor')
+    return position
+
+
+MEMORY_UNITS_IN_GB = {'mb': Decimal(1) / 1024, 'gb': Decimal(1), 'tb': Decimal(1024)}
+
+
+def parse_memory_gb(value):
+    if value is None:
+        return None
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(mb|gb|tb)?\s*', str(value), re.IGNORECASE)
+    if not match:
+        return None
+    unit = (match.group(2) or 'gb').lower()
+    return int((Decimal(match.group(1)) * MEMORY_UNITS_IN_GB[unit]).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def get_catalog_filters(query_params):
+    return {
+        'diagonal_screen': query_params.getlist('diagonal_screen'),
+        'built_in_memory': query_params.getlist('built_in_memory'),
+        'brand': query_params.getlist('brand'),
+        'price_min': query_params.get('price_min'),
+        'price_max': query_params.get('price_max'),
+        'weight_min': query_params.get('weight_min'),
+        'weight_max': query_params.get('weight_max'),
+        'memory_min': query_params.get('memory_min'),
+        'memory_max': query_params.get('memory_max'),
+        'effective_price_min': query_params.get('effective_price_min'),
+        'effective_price_max': query_params.get('effective_price_max'),
+    }
+
+
+def get_conditional_catalog_response(request, etag, last_modified, build_response):
+    etag = quote_etag(etag)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build_response()
+    if response.status_code in (200, 304):
+        response.headers['ETag'] = etag
+        if timestamp is not None:
+            response.headers['Last-Modified'] = http_date(timestamp)
+    return response
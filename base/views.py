@@ -1,7 +1,14 @@
+import hashlib
+import io
+import json
+import os
 import uuid
 from datetime import datetime
 
 from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.permissions import AllowAny
@@ -9,16 +16,27 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .const import END_DATE_DEFAULT, START_DATE_DEFAULT
+from .const import CATALOG_PAGE_SIZE, CATALOG_PAGE_SIZE_MAX, \
+    SEARCH_QUERY_MAX_LENGTH, PRODUCT_BY_IDS_MAX, SIMILAR_DEFAULT_K, SIMILAR_MAX_K, PRODUCT_COMPARE_MAX, \
+    SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT, ORDER_PAGE_SIZE, ORDER_PAGE_SIZE_MAX, ORDER_IDEMPOTENCY_KEY_MAX_LENGTH, \
+    ORDER_BULK_CANCEL_MAX
 from .permission import IsAdminOrReadOnly, AuthenticatedUser, AllowOnlyAdmin, AuthenticatedOrSafeMethodsUser
 from .serializer import TelephoneSerializer, BrandSerializer, UserSerializer, \
     GetAllTelephoneSerializer, OrderSerializerAuthUser, OrderSerializerNoAuthUser, OrderProductsSerializer, \
     UserRegistrationSerializer, VendorSerializer, DeliverySerializer, DeliveryDetailsSerializer, CommentSerializer, \
-    CommentPatchSerializer, DeliveryPatchSerializer, WishListSerializer
+    CommentPatchSerializer, DeliveryPatchSerializer, WishListSerializer, OrderBulkCancelSerializer
 
 from base.models import Telephone, Brand, UserProfile, Order, City, Vendor, Delivery, delivery_details, Address, \
-    Comment, Views, wish_list
-from .utils import write_error_to_file
+    Comment, Views, wish_list, catalog_listing, catalog_version, order_idempotency_key
+from .cache import catalog_cache, stock_cache, get_live_stock
+from .facets import facet_index
+from .similar import similarity_index
+from .suggest import suggest_index
+from .exporter import export_orders, EXPORT_FORMATS, EXPORT_CONTENT_TYPES
+from .intake import enqueue, get_status, queue_stats
+from .importer import import_telephones, IMPORT_FORMATS
+from .utils import write_error_to_file, get_catalog_filters, get_conditional_catalog_response, get_last_month, \
+    get_today
 
 
 class TelephoneGetPostAPIView(APIView):
@@ -38,46 +56,79 @@ class TelephoneGetPostAPIView(APIView):
             price_max = request.query_params.get('price_max')
             weight_min = request.query_params.get('weight_min')
             weight_max = request.query_params.get('weight_max')
+            memory_min = request.query_params.get('memory_min')
+            memory_max = request.query_params.get('memory_max')
+            effective_price_min = request.query_params.get('effective_price_min')
+            effective_price_max = request.query_params.get('effective_price_max')
 
             sort_dict = {
-                'title': 'base_telephone.title',
-                'price': 'base_telephone.price',
+                'title': 'base_catalog_listing.title',
+                'price': 'base_catalog_listing.price',
+                'effective_price': 'base_catalog_listing.effective_price',
             }
             if sort_by not in sort_dict:
                 sort_by = 'title'
 
             sort_field = sort_dict[sort_by]
-            if sort_dir == 'desc':
-                sort_field += ' DESC'
-
-            if request.user.is_staff:
-                query_params_full_date = request.query_params.get('fulldata', None)
-                if query_params_full_date:
-                    result = Telephone.get_all(
+            if sort_dir != 'desc':
+                sort_dir = 'asc'
+
+            full_data = bool(request.user.is_staff and request.query_params.get('fulldata', None))
+
+            page_cursor = request.query_params.get('cursor')
+            limit = request.query_params.get('limit')
+            if page_cursor is not None or limit is not None:
+                try:
+                    limit = int(limit) if limit is not None else CATALOG_PAGE_SIZE
+                    if not 0 < limit <= CATALOG_PAGE_SIZE_MAX:
+                        raise ValueError(f'limit must be between 1 and {CATALOG_PAGE_SIZE_MAX}')
+                    result = Telephone.get_page(
                         sort_field,
-                        True,
+                        sort_dir,
+                        full_data,
+                        page_cursor,
+                        limit,
                         diagonal_screen,
                         built_in_memory,
                         brand,
                         price_min,
                         price_max,
                         weight_min,
-                        weight_max
+                        weight_max,
+                        memory_min,
+                        memory_max,
+                        effective_price_min,
+                        effective_price_max
                     )
-                    return Response(result, status=status.HTTP_200_OK)
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                if not full_data:
+                    result['results'] = GetAllTelephoneSerializer(result['results'], many=True).data
+                return Response(result, status=status.HTTP_200_OK)
+
+            if sort_dir == 'desc':
+                sort_field += ' DESC'
+
             result = Telephone.get_all(
                 sort_field,
-                False,
+                full_data,
                 diagonal_screen,
                 built_in_memory,
                 brand,
                 price_min,
                 price_max,
                 weight_min,
-                weight_max
+                weight_max,
+                memory_min,
+                memory_max,
+                effective_price_min,
+                effective_price_max
             )
-            serialized_result = GetAllTelephoneSerializer(result, many=True)
-            return Response(serialized_result.data, status=status.HTTP_200_OK)
+            if full_data:
+                return Response(result, status=status.HTTP_200_OK)
+            return Response(GetAllTelephoneSerializer(result, many=True).data, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             write_error_to_file('GET_TelephoneGetAPIView', e)
             return Response({'error': e}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -106,10 +157,22 @@ class TelephoneGetItemPatchDeleteAPIView(APIView):
             if request.user.is_authenticated:
                 data = {'telephone_id': telephone_id, 'user_id': request.user.id}
                 Views.post_item(data)
-            result_get_item = Telephone.get_item(telephone_id)
-            if result_get_item:
-                return Response(result_get_item, status=status.HTTP_200_OK)
-            return Response({'error': 'Object does not exist'}, status=status.HTTP_400_BAD_REQUEST)
+            validators = catalog_listing.get_validators(telephone_id)
+            if not validators:
+                return Response({'error': 'Object does not exist'}, status=status.HTTP_400_BAD_REQUEST)
+            row_version, stock_version, last_modified = validators
+
+            def build_response():
+                result_get_item = catalog_cache.get_or_set(
+                    ('product', telephone_id, stock_version), lambda: Telephone.get_item(telephone_id)
+                )
+                if result_get_item:
+                    return Response(result_get_item, status=status.HTTP_200_OK)
+                return Response({'error': 'Object does not exist'}, status=status.HTTP_400_BAD_REQUEST)
+
+            return get_conditional_catalog_response(
+                request, f'W/"product-{telephone_id}-{row_version}-{stock_version}"', last_modified, build_response
+            )
         except TypeError:
             return Response({'error': 'Object does not exist'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -152,30 +215,243 @@ class TelephoneGetListAPIView(APIView):
     def get(self, request):
         try:
             telephone_ids_string = request.query_params.getlist('id')
-            result_get_item = Telephone.get_list(telephone_ids_string)
-            if result_get_item:
-                return Response(result_get_item, status=status.HTTP_200_OK)
-            return Response({[]}, status=status.HTTP_200_OK)
-        except TypeError:
-            return Response({'error': 'Object does not exist'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(telephone_ids_string) > PRODUCT_BY_IDS_MAX:
+                return Response({'error': f'At most {PRODUCT_BY_IDS_MAX} ids can be requested'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if not all(telephone_id.isdecimal() for telephone_id in telephone_ids_string):
+                return Response({'error': 'id must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+            telephone_ids = list(dict.fromkeys(int(telephone_id) for telephone_id in telephone_ids_string))
+
+            def load(keys):
+                rows = Telephone.get_list([key[1] for key in keys])
+                return {('product_list_item', row['id']): row for row in rows}
+
+            keys = [('product_list_item', telephone_id) for telephone_id in telephone_ids]
+            cached = catalog_cache.get_or_set_many(keys, load)
+            stock = get_live_stock(telephone_ids)
+            result_get_item = [
+                {**cached[key], 'number_stock': stock[key[1]]['number_stock']} if stock.get(key[1]) else cached[key]
+                for key in keys if cached[key]
+            ]
+            return Response(result_get_item, status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_item_TelephoneGetAPIView', e)
             return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class FiltersForTelephoneGetAPIView(APIView):
+class TelephoneImportAPIView(APIView):
+    queryset = Telephone.objects.all()
+    permission_classes = [AllowOnlyAdmin]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+            file_format = request.query_params.get('format') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+            if file_format not in IMPORT_FORMATS:
+                return Response({'error': f'format must be one of {", ".join(IMPORT_FORMATS)}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            report = import_telephones(stream, file_format)
+            return Response(report, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('POST_TelephoneImportAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TelephoneStockAPIView(APIView):
+    queryset = Telephone.objects.all()
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            telephone_ids_string = request.query_params.getlist('id')
+            if len(telephone_ids_string) > PRODUCT_BY_IDS_MAX:
+                return Response({'error': f'At most {PRODUCT_BY_IDS_MAX} ids can be requested'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if not all(telephone_id.isdecimal() for telephone_id in telephone_ids_string):
+                return Response({'error': 'id must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+            telephone_ids = list(dict.fromkeys(int(telephone_id) for telephone_id in telephone_ids_string))
+
+            cached = get_live_stock(telephone_ids)
+            result = [cached[telephone_id] for telephone_id in telephone_ids if cached[telephone_id]]
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_TelephoneStockAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TelephoneCompareAPIView(APIView):
     queryset = Telephone.objects.all()
     permission_classes = [AllowAny]
 
     def get(self, request):
         try:
-            result = Telephone.get_filters()
+            telephone_ids_string = request.query_params.getlist('id')
+            if not telephone_ids_string:
+                return Response({'error': 'id parameter is missing'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(telephone_ids_string) > PRODUCT_COMPARE_MAX:
+                return Response({'error': f'At most {PRODUCT_COMPARE_MAX} ids can be compared'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if not all(telephone_id.isdecimal() for telephone_id in telephone_ids_string):
+                return Response({'error': 'id must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+            telephone_ids = list(dict.fromkeys(int(telephone_id) for telephone_id in telephone_ids_string))
+            version, last_modified = catalog_version.get_validators()
+            stock_version = catalog_listing.get_stock_version(telephone_ids)
+
+            def build_response():
+                result = catalog_cache.get_or_set(
+                    ('product_compare', tuple(telephone_ids), stock_version),
+                    lambda: Telephone.get_compare(telephone_ids), version
+                )
+                return Response(result, status=status.HTTP_200_OK)
+
+            etag = f'W/"compare-{version}-{stock_version}-{"-".join(map(str, telephone_ids))}"'
+            return get_conditional_catalog_response(request, etag, last_modified, build_response)
+        except Exception as e:
+            write_error_to_file('GET_TelephoneCompareAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TelephoneSimilarAPIView(APIView):
+    queryset = Telephone.objects.all()
+    permission_classes = [AllowAny]
+
+    def get(self, request, id):
+        try:
+            try:
+                k = int(request.query_params.get('k', SIMILAR_DEFAULT_K))
+                if not 0 < k <= SIMILAR_MAX_K:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': f'k must be between 1 and {SIMILAR_MAX_K}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            version = similarity_index.sync()
+
+            def load():
+                similar = similarity_index.get_similar(id, k)
+                if similar is None:
+                    return None
+                rows = {row['id']: row for row in Telephone.get_list([telephone_id for telephone_id, _ in similar])}
+                return [
+                    {**GetAllTelephoneSerializer(rows[telephone_id]).data, 'distance': round(distance, 4)}
+                    for telephone_id, distance in similar if telephone_id in rows
+                ]
+
+            result = catalog_cache.get_or_set(('product_similar', id, k), load, version)
+            if result is None:
+                return Response({'error': 'Object does not exist'}, status=status.HTTP_404_NOT_FOUND)
             return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_TelephoneSimilarAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TelephoneSuggestAPIView(APIView):
+    queryset = Telephone.objects.all()
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            search_query = request.query_params.get('q', '')
+            if len(search_query) > SEARCH_QUERY_MAX_LENGTH:
+                return Response({'error': f'q must be at most {SEARCH_QUERY_MAX_LENGTH} characters'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = int(request.query_params.get('limit', SUGGEST_DEFAULT_LIMIT))
+                if not 0 < limit <= SUGGEST_MAX_LIMIT:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': f'limit must be between 1 and {SUGGEST_MAX_LIMIT}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response(suggest_index.suggest(search_query, limit), status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_TelephoneSuggestAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SuggestIndexStatsAPIView(APIView):
+    permission_classes = [AllowOnlyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return Response(suggest_index.stats(), status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_SuggestIndexStatsAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TelephoneSearchAPIView(APIView):
+    queryset = Telephone.objects.all()
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            search_query = request.query_params.get('q', '').strip()
+            if not search_query:
+                return Response({'error': 'q parameter is missing'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(search_query) > SEARCH_QUERY_MAX_LENGTH:
+                return Response({'error': f'q must be at most {SEARCH_QUERY_MAX_LENGTH} characters'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = int(request.query_params.get('limit', CATALOG_PAGE_SIZE))
+                if not 0 < limit <= CATALOG_PAGE_SIZE_MAX:
+                    raise ValueError(f'limit must be between 1 and {CATALOG_PAGE_SIZE_MAX}')
+                result = Telephone.search(
+                    search_query,
+                    request.query_params.get('cursor'),
+                    limit,
+                    **get_catalog_filters(request.query_params)
+                )
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            result['results'] = GetAllTelephoneSerializer(result['results'], many=True).data
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_TelephoneSearchAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class FiltersForTelephoneGetAPIView(APIView):
+    queryset = Telephone.objects.all()
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            filters = get_catalog_filters(request.query_params)
+            cache_key = ('filters',) + tuple(
+                (key, tuple(sorted(value)) if isinstance(value, list) else value) for key, value in filters.items()
+            )
+            version, last_modified = catalog_version.get_validators()
+
+            def build_response():
+                try:
+                    result = catalog_cache.get_or_set(
+                        cache_key, lambda: facet_index.get_facets(**filters), version
+                    )
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                return Response(result, status=status.HTTP_200_OK)
+
+            return get_conditional_catalog_response(request, f'W/"filters-{version}"', last_modified, build_response)
         except Exception as e:
             write_error_to_file('GET_FiltersForTelephoneGetAPIView', e)
             return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class CatalogCacheStatsAPIView(APIView):
+    permission_classes = [AllowOnlyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return Response({**catalog_cache.stats(), 'stock': stock_cache.stats()}, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_CatalogCacheStatsAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class BrandGetPostAPIView(APIView):
     queryset = Brand.objects.all()
     serializer = BrandSerializer
@@ -183,8 +459,11 @@ class BrandGetPostAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            result_get_all = Brand.get_all()
-            return Response(result_get_all, status=status.HTTP_200_OK)
+            version, last_modified = catalog_version.get_validators()
+            return get_conditional_catalog_response(
+                request, f'W/"brands-{version}"', last_modified,
+                lambda: Response(Brand.get_all(), status=status.HTTP_200_OK)
+            )
         except Exception as e:
             write_error_to_file('GET_BrandAPIView', e)
             return Response({'error': e}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -434,27 +713,112 @@ class OrderGetAPIView(APIView):
             user_id = request.query_params.get('user_id', None)
             full_data = request.query_params.get('fulldata', None)
             order_status = request.query_params.get('status', None)
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
-            if full_data:
-                result = Order.get_full_data(start_date, end_date, order_status, user_id)
-                return Response(result, status=status.HTTP_200_OK)
-            result = Order.get_all(start_date, end_date, user_id)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
+            page_cursor = request.query_params.get('cursor')
+            limit = request.query_params.get('limit')
+            try:
+                if page_cursor is not None or limit is not None:
+                    limit = int(limit) if limit is not None else ORDER_PAGE_SIZE
+                    if not 0 < limit <= ORDER_PAGE_SIZE_MAX:
+                        raise ValueError(f'limit must be between 1 and {ORDER_PAGE_SIZE_MAX}')
+                if full_data:
+                    result = Order.get_full_data(start_date, end_date, order_status, user_id, page_cursor, limit)
+                else:
+                    result = Order.get_all(start_date, end_date, user_id, order_status, page_cursor, limit)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_BrandAPIView', e)
             return Response({'error': e}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class OrderExportAPIView(APIView):
+    permission_classes = [AllowOnlyAdmin]
+    queryset = Order.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        try:
+            file_format = request.query_params.get('format', 'ndjson')
+            if file_format not in EXPORT_FORMATS:
+                return Response({'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
+            chunks = export_orders(
+                file_format,
+                start_date,
+                end_date,
+                request.query_params.get('status', None),
+                request.query_params.get('user_id', None)
+            )
+            response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[file_format])
+            response['Content-Disposition'] = f'attachment; filename="orders_{start_date}_{end_date}.{file_format}"'
+            return response
+        except Exception as e:
+            write_error_to_file('GET_OrderExportAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class OrderPostAPIView(APIView):
     permission_classes = [AllowAny]
     queryset = Order.objects.all()
 
     def post(self, request, *args, **kwargs):
         try:
+            idempotency_key = request.headers.get('Idempotency-Key')
+            if idempotency_key is None:
+                return self.place_order(request)
+            if not 0 < len(idempotency_key) <= ORDER_IDEMPOTENCY_KEY_MAX_LENGTH:
+                return Response({
+                    'error': f'Idempotency-Key must be 1 to {ORDER_IDEMPOTENCY_KEY_MAX_LENGTH} characters long'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            request_hash = hashlib.sha256(
+                json.dumps([request.user.id, request.data], sort_keys=True, default=str).encode()
+            ).hexdigest()
+            with transaction.atomic(), connection.cursor() as cursor:
+                stored = order_idempotency_key.acquire(cursor, idempotency_key, request_hash)
+                if stored is None:
+                    response = self.place_order(request)
+                    if response.status_code in (status.HTTP_201_CREATED, status.HTTP_202_ACCEPTED):
+                        order_idempotency_key.store(cursor, idempotency_key, response.status_code, response.data)
+                    else:
+                        transaction.set_rollback(True)
+                    return response
+
+            if stored['request_hash'] != request_hash:
+                return Response({'error': 'Idempotency-Key was already used for a different request'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if stored['status'] is None:
+                return Response({'error': 'A request with this Idempotency-Key is still in progress'},
+                                status=status.HTTP_409_CONFLICT)
+            response = Response(stored['body'], status=stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        except Exception as e:
+            write_error_to_file('POST_GetPostOrderAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def enqueue_order(request, validated_data, user_id=None):
+        token = enqueue(validated_data, user_id)
+        status_url = request.build_absolute_uri(reverse('order_intake', kwargs={'token': token}))
+        response = Response({'id': token, 'status': 'QUEUED', 'status_url': status_url},
+                            status=status.HTTP_202_ACCEPTED)
+        response['Location'] = status_url
+        return response
+
+    def place_order(self, request):
+        try:
+            respond_async = 'respond-async' in request.headers.get('Prefer', '')
             if request.user.is_authenticated:
                 serializer = OrderSerializerAuthUser(data=request.data)
                 if serializer.is_valid():
+                    if respond_async:
+                        return self.enqueue_order(request, serializer.validated_data, request.user.id)
                     serializer.validated_data['user_id'] = request.user.id
                     result = Order.post(serializer.validated_data)
                     if isinstance(result, dict) and 'error' in result:
@@ -463,6 +827,8 @@ class OrderPostAPIView(APIView):
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             serializer = OrderSerializerNoAuthUser(data=request.data)
             if serializer.is_valid():
+                if respond_async:
+                    return self.enqueue_order(request, serializer.validated_data)
                 data = serializer.validated_data
                 data['username'] = str(uuid.uuid4())
                 data['password'] = str(uuid.uuid4())
@@ -479,6 +845,51 @@ class OrderPostAPIView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class OrderIntakeGetAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            result = get_status(kwargs.get('token'))
+            if result is None:
+                return Response({'error': 'Object does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_OrderIntakeGetAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class OrderIntakeStatsAPIView(APIView):
+    permission_classes = [AllowOnlyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return Response(queue_stats(), status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('GET_OrderIntakeStatsAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class OrderBulkCancelAPIView(APIView):
+    permission_classes = [AllowOnlyAdmin]
+    queryset = Order.objects.all()
+
+    def post(self, request, *args, **kwargs):
+        try:
+            serializer = OrderBulkCancelSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            order_ids = sorted(set(serializer.validated_data['ids']))
+            canceled = Order.cancel(order_ids)
+            return Response({
+                'canceled': canceled,
+                'skipped': sorted(set(order_ids) - set(canceled)),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            write_error_to_file('POST_OrderBulkCancelAPIView', e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class OrderGetItemPatchAPIView(APIView):
     permission_classes = [AuthenticatedUser]
     queryset = Order.objects.all()
@@ -515,11 +926,6 @@ class OrderGetItemPatchAPIView(APIView):
                         'error': 'Only admin can update order when status is not PENDING'
                     }, status=status.HTTP_403_FORBIDDEN)
 
-                data = request.data
-                if data.get('status') == 'CANCELED':
-                    for product in order['order_product_details']:
-                        Telephone.edit_amount(product['telephone_id'], product['amount'])
-
                 result = Order.patch(order_id, request.data)
                 return Response(result, status=status.HTTP_200_OK)
             return Response({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
@@ -774,8 +1180,8 @@ class ViewsGetFullDataAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
             result = Views.get_full_data_stat(start_date, end_date)
             return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
@@ -789,8 +1195,8 @@ class OrderGetStatAVGCostAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
             return Response(Order.get_avg_order_cost(start_date, end_date), status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_OrderGetStatAVGCostAPIView', e)
@@ -803,8 +1209,8 @@ class OrderGetStatAmountProductAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
             return Response(Order.get_order_amount_product(start_date, end_date), status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_OrderGetStatAVGCostAPIView', e)
@@ -817,8 +1223,8 @@ class OrderGetStatAmountOrderAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
             return Response(Order.get_order_amount(start_date, end_date), status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_OrderGetStatAVGCostAPIView', e)
@@ -831,8 +1237,8 @@ class OrderGetTotalSumAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
             return Response(Order.get_total_order_cost(start_date, end_date), status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_OrderGetStatAVGCostAPIView', e)
@@ -845,8 +1251,8 @@ class ProductGetPercentSellsAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            start_date = request.query_params.get('start_date', START_DATE_DEFAULT)
-            end_date = request.query_params.get('end_date', END_DATE_DEFAULT)
+            start_date = request.query_params.get('start_date', get_last_month())
+            end_date = request.query_params.get('end_date', get_today())
             return Response(Telephone.get_percent_sells(start_date, end_date), status=status.HTTP_200_OK)
         except Exception as e:
             write_error_to_file('GET_OrderGetStatAVGCostAPIView', e)
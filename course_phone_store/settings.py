@@ -95,6 +95,8 @@ DATABASES = {
         'PASSWORD': config['BD_PASSWORD'],
         'HOST': 'localhost',
         'PORT': '5432',
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'course_phone_store.settings')
 
 application = get_wsgi_application()
+
+from base.suggest import suggest_index  # noqa: E402
+
+suggest_index.warm()